@@ -7,14 +7,24 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-from matplotlib.gridspec import GridSpec
 import numpy as np
 import json
+import os
+import re
 import torch
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from PIL import Image
 from torchvision import transforms
 from train_dual_predictor import DualPredictor
+from image_utils import fast_open
+
+# Each grid cell is ~650 px wide at 300 dpi, so larger frames are wasted work
+THUMBNAIL_SIZE = (800, 800)
+
+# Matches both 2024-01-15 and 20240115 style dates in frame filenames
+DATE_PATTERN = re.compile(r"(\d{4})-?(\d{2})-?(\d{2})")
 
 def load_model_and_predict(midday_image_path):
     """Load model and predict quality/peak time for a midday image."""
@@ -45,6 +55,16 @@ def load_model_and_predict(midday_image_path):
     
     return pred_quality.item(), pred_peak.item(), pred_duration.item()
 
+@lru_cache(maxsize=None)
+def _list_sunset_frames(tp_str):
+    """List extracted frame filenames for one timepoint (scanned once per run)."""
+    frames_dir = f"data/extracted_frames/sunset/{tp_str}min"
+    try:
+        with os.scandir(frames_dir) as entries:
+            return frozenset(entry.name for entry in entries)
+    except FileNotFoundError:
+        return frozenset()
+
 def get_sunset_images_for_date(date_str, timepoints=[-10, -5, 0, 5, 10, 15, 20, 25]):
     """Get sunset images for all timepoints for a given date - USE ONLY NEW EXTRACTED FRAMES."""
     sunset_images = {}
@@ -52,29 +72,40 @@ def get_sunset_images_for_date(date_str, timepoints=[-10, -5, 0, 5, 10, 15, 20,
     for tp in timepoints:
         tp_str = f"{tp:+d}"
         # ONLY use newly extracted frames (the fixed ones)
-        img_path = Path(f"data/extracted_frames/sunset/{tp_str}min/sunset_{date_str.replace('-', '')}_{tp_str}min.jpg")
+        filename = f"sunset_{date_str.replace('-', '')}_{tp_str}min.jpg"
         
-        if img_path.exists():
-            sunset_images[tp] = img_path
+        if filename in _list_sunset_frames(tp_str):
+            sunset_images[tp] = Path(f"data/extracted_frames/sunset/{tp_str}min/{filename}")
     
     return sunset_images
 
+@lru_cache(maxsize=None)
+def _load_scores(tp_str):
+    """Load a timepoint's scores.json once, indexed as {YYYYMMDD: quality_score}."""
+    scores_file = Path(f"data/grading_by_timepoint/timepoint_{tp_str}min/scores.json")
+    try:
+        with open(scores_file, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    
+    indexed = {}
+    for img_path, score_data in data.items():
+        match = DATE_PATTERN.search(Path(img_path).name)
+        if match and score_data.get("graded"):
+            # Keep the first graded entry per date, as the old scan did
+            indexed.setdefault("".join(match.groups()), score_data["quality_score"])
+    return indexed
+
 def get_actual_scores(date_str, timepoints=[-10, 0, 10]):
     """Get actual scores for scored timepoints."""
     scores = {}
+    date_key = date_str.replace('-', '')
     
     for tp in timepoints:
-        tp_str = f"{tp:+d}"
-        scores_file = Path(f"data/grading_by_timepoint/timepoint_{tp_str}min/scores.json")
-        if scores_file.exists():
-            with open(scores_file, "r") as f:
-                data = json.load(f)
-            
-            # Find score for this date
-            for img_path, score_data in data.items():
-                if date_str in str(img_path) and score_data.get("graded"):
-                    scores[tp] = score_data["quality_score"]
-                    break
+        score = _load_scores(f"{tp:+d}").get(date_key)
+        if score is not None:
+            scores[tp] = score
     
     return scores
 
@@ -96,9 +127,20 @@ def create_figure_examples_grid():
     all_timepoints = [-10, -5, 0, 5, 10, 15, 20, 25]
     scored_timepoints = [-10, 0, 10]
     
-    # Create figure with grid
-    fig = plt.figure(figsize=(20, 12))
-    gs = GridSpec(5, 9, figure=fig, width_ratios=[1.2] + [1]*8, hspace=0.3, wspace=0.1)
+    # Create figure with all 5x9 axes in one call
+    fig, axes = plt.subplots(5, 9, figsize=(20, 12),
+                             gridspec_kw=dict(width_ratios=[1.2] + [1]*8, hspace=0.3, wspace=0.1))
+    
+    # Decode every image up front in a thread pool (Pillow releases the GIL
+    # while decoding); matplotlib calls stay on the main thread
+    sunset_images_by_row = [get_sunset_images_for_date(example["date"], all_timepoints)
+                            for example in selected]
+    image_paths = [Path(example["midday_image"]) for example in selected
+                   if Path(example["midday_image"]).exists()]
+    for sunset_images in sunset_images_by_row:
+        image_paths.extend(sunset_images.values())
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        images = dict(zip(image_paths, executor.map(partial(fast_open, box=THUMBNAIL_SIZE), image_paths)))
     
     for row, example in enumerate(selected):
         date_str = example["date"]
@@ -111,10 +153,9 @@ def create_figure_examples_grid():
         actual_scores = get_actual_scores(date_str, scored_timepoints)
         
         # Column 0: Midday image
-        ax_midday = fig.add_subplot(gs[row, 0])
-        if midday_path.exists():
-            img = Image.open(midday_path)
-            ax_midday.imshow(img)
+        ax_midday = axes[row, 0]
+        if midday_path in images:
+            ax_midday.imshow(images[midday_path])
             ax_midday.axis('off')
             # Add prediction annotation
             if pred_quality is not None:
@@ -127,16 +168,15 @@ def create_figure_examples_grid():
             ax_midday.axis('off')
         
         # Columns 1-8: Sunset images at each timepoint
+        sunset_images = sunset_images_by_row[row]
         for col, tp in enumerate(all_timepoints, 1):
-            ax = fig.add_subplot(gs[row, col])
+            ax = axes[row, col]
             
-            # Get sunset image
-            sunset_images = get_sunset_images_for_date(date_str, [tp])
+            # Get sunset image (only existing frames are returned)
             sunset_path = sunset_images.get(tp)
             
-            if sunset_path and sunset_path.exists():
-                img = Image.open(sunset_path)
-                ax.imshow(img)
+            if sunset_path:
+                ax.imshow(images[sunset_path])
                 ax.axis('off')
                 
                 # Add annotation if this is a scored timepoint
@@ -156,6 +196,10 @@ def create_figure_examples_grid():
                        ha='center', va='center', fontsize=7)
                 ax.axis('off')
     
+    # Hide rows left over when there are fewer than 5 examples
+    for ax in axes[len(selected):].flat:
+        ax.axis('off')
+    
     # Add column headers
     fig.text(0.05, 0.98, 'Midday\n(3h before)', ha='center', va='top', fontsize=10, fontweight='bold')
     for col, tp in enumerate(all_timepoints, 1):
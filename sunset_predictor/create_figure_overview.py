@@ -2,8 +2,11 @@
 Create a combined overview of all figures.
 """
 
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
+from matplotlib.collections import PolyCollection
+import os
 from pathlib import Path
 
 def create_figure_overview():
@@ -12,7 +15,10 @@ def create_figure_overview():
     ax.axis('off')
     
     figures_dir = Path("figures")
-    pdf_files = sorted(figures_dir.glob("*.pdf"))
+    # One directory read; DirEntry caches its stat() (free on Windows)
+    with os.scandir(figures_dir) as entries:
+        pdf_files = sorted((e for e in entries if e.name.endswith('.pdf')),
+                           key=lambda e: e.name)
     
     # Title
     ax.text(0.5, 0.98, "Sunset Predictor - All Figures", 
@@ -34,6 +40,13 @@ def create_figure_overview():
         "fig9_gradcam.pdf": "Figure 8: Grad-CAM Attention Visualizations"
     }
     
+    # Draw all boxes as one collection rather than one Rectangle patch each
+    box_bottoms = [y_start - i * y_spacing - 0.05 for i in range(len(pdf_files))]
+    boxes = PolyCollection(
+        [[(0.05, y), (0.95, y), (0.95, y + 0.08), (0.05, y + 0.08)] for y in box_bottoms],
+        linewidths=2, edgecolors='black', facecolors='lightblue', alpha=0.3)
+    ax.add_collection(boxes, autolim=False)
+    
     for i, pdf_file in enumerate(pdf_files):
         y_pos = y_start - i * y_spacing
         
@@ -41,12 +54,6 @@ def create_figure_overview():
         size_kb = pdf_file.stat().st_size / 1024
         info_text = f"{descriptions.get(pdf_file.name, pdf_file.name)}\nFile: {pdf_file.name} ({size_kb:.1f} KB)"
         
-        # Draw box
-        rect = Rectangle((0.05, y_pos - 0.05), 0.9, 0.08, 
-                        linewidth=2, edgecolor='black', 
-                        facecolor='lightblue', alpha=0.3)
-        ax.add_patch(rect)
-        
         ax.text(0.1, y_pos, info_text, 
                ha='left', va='top', fontsize=11, fontweight='bold',
                transform=ax.transAxes, family='monospace')
@@ -58,17 +65,22 @@ def create_figure_overview():
            ha='center', va='bottom', fontsize=10, style='italic',
            transform=ax.transAxes)
     
-    plt.tight_layout()
+    fig.tight_layout()
+    # bbox_inches='tight' does an extra draw per save just to measure the
+    # figure; measure once and reuse the box for both outputs
+    tight_bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(
+        plt.rcParams['savefig.pad_inches'])
+    
     output_path = Path("figures_overview.pdf")
-    plt.savefig(output_path, format='pdf', bbox_inches='tight', dpi=300)
+    fig.savefig(output_path, format='pdf', bbox_inches=tight_bbox, dpi=300)
     print(f"✓ Created overview: {output_path}")
     
     # Also create as PNG for easier viewing
     output_path_png = Path("figures_overview.png")
-    plt.savefig(output_path_png, format='png', bbox_inches='tight', dpi=150)
+    fig.savefig(output_path_png, format='png', bbox_inches=tight_bbox, dpi=150)
     print(f"✓ Created overview image: {output_path_png}")
     
-    plt.close()
+    plt.close(fig)
     
     # Try to open
     import subprocess
@@ -3,15 +3,18 @@ Generate publication-quality figures for NeurIPS paper.
 """
 
 import json
+import os
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from pathlib import Path
 from datetime import datetime
 import seaborn as sns
-from PIL import Image
 import torch
-from collections import defaultdict
+from image_utils import fast_open
+from io_utils import is_stale
 
 # Set style for publication-quality figures
 plt.style.use('seaborn-v0_8-paper')
@@ -50,9 +53,12 @@ def load_predictions(metadata_file, checkpoint_path, model_type="resnet18", devi
     model = create_model(model_type, pretrained=False)
     checkpoint = torch.load(checkpoint_path, map_location=device, weights_only=False)
     model.load_state_dict(checkpoint["model_state_dict"])
-    model = model.to(device)
+    model = model.to(device, memory_format=torch.channels_last)
     model.eval()
     
+    use_cuda = torch.device(device).type == "cuda"
+    input_dtype = torch.bfloat16 if use_cuda else torch.float32
+    
     # Create dataset
     transform = transforms.Compose([
         transforms.Resize((224, 224)),
@@ -61,31 +67,96 @@ def load_predictions(metadata_file, checkpoint_path, model_type="resnet18", devi
                            std=[0.229, 0.224, 0.225])
     ])
     
-    dataset = SunsetDataset(metadata, "data/synthetic_images", transform=transform)
-    loader = DataLoader(dataset, batch_size=32, shuffle=False)
-    
-    predictions = []
-    targets = []
-    image_paths = []
-    
-    with torch.no_grad():
-        for batch_idx, (images, labels) in enumerate(loader):
-            images = images.to(device)
-            outputs = model(images)
-            predictions.extend(outputs.cpu().numpy())
-            targets.extend(labels.cpu().numpy())
-            image_paths.extend([metadata[batch_idx * 32 + i]["image_path"] 
-                               for i in range(len(outputs))])
-    
-    return np.array(predictions), np.array(targets), image_paths, metadata
+    # Decode the same way get_data_loaders does for training
+    dataset = SunsetDataset(metadata, "data/synthetic_images", transform=transform,
+                            decode_size=224)
+    num_workers = min(8, os.cpu_count() or 1)
+    loader = DataLoader(dataset, batch_size=64, shuffle=False,
+                        num_workers=num_workers, pin_memory=use_cuda,
+                        persistent_workers=num_workers > 0,
+                        prefetch_factor=4 if num_workers > 0 else None)
+    
+    # On GPU run in bfloat16 and compile the graph (fused kernels + CUDA
+    # graphs). On CPU bfloat16 is usually slower, so keep float32 there.
+    # The graph is compiled for one static batch shape: warm up with the
+    # loader's batch size, and the ragged last batch is padded up to it below
+    if use_cuda:
+        model = model.to(torch.bfloat16)
+        model = torch.compile(model, mode="max-autotune", dynamic=False)
+        # Warm up so the first real batch doesn't pay compile latency
+        with torch.inference_mode():
+            model(torch.zeros(loader.batch_size, 3, 224, 224, device=device, dtype=input_dtype)
+                  .to(memory_format=torch.channels_last))
+    
+    # Preallocate outputs (the model returns one scalar per image)
+    num_samples = len(dataset)
+    predictions = np.empty(num_samples, dtype=np.float32)
+    targets = np.empty(num_samples, dtype=np.float32)
+    offset = 0
+    
+    with torch.inference_mode():
+        for images, labels in loader:
+            images = images.to(device, dtype=input_dtype,
+                               memory_format=torch.channels_last,
+                               non_blocking=True)
+            batch_size = images.shape[0]
+            if use_cuda and batch_size < loader.batch_size:
+                pad = images.new_zeros((loader.batch_size - batch_size, *images.shape[1:]))
+                images = torch.cat([images, pad]).contiguous(memory_format=torch.channels_last)
+            outputs = model(images).float()[:batch_size]
+            predictions[offset:offset + batch_size] = outputs.cpu().numpy()
+            targets[offset:offset + batch_size] = labels.numpy()
+            offset += batch_size
+    
+    # The loader doesn't shuffle, so paths line up with metadata order
+    image_paths = [item["image_path"] for item in metadata]
+    
+    return predictions, targets, image_paths, metadata
+
 
+_shared_figure = None
 
-def figure2_scatter_plot(predictions, targets, output_path="figures/fig2_scatter.pdf"):
+
+def reusable_figure(figsize):
+    """Return (fig, ax) on one shared, cleared Figure instead of a new one per plot."""
+    global _shared_figure
+    if _shared_figure is None:
+        _shared_figure = plt.figure(figsize=figsize)
+    else:
+        _shared_figure.clf()
+        _shared_figure.set_size_inches(figsize)
+    return _shared_figure, _shared_figure.add_subplot(111)
+
+
+def compute_stats(predictions, targets):
+    """Compute residual statistics shared by figures 2-4 in a single pass."""
+    residuals = predictions - targets
+    abs_errors = np.abs(residuals)
+    centered = targets - targets.mean()
+    sq_error = residuals @ residuals
+    q1, q3 = np.percentile(residuals, [25, 75])
+    return {
+        "residuals": residuals,
+        "abs_errors": abs_errors,
+        "mae": abs_errors.mean(),
+        "rmse": np.sqrt(sq_error / len(residuals)),
+        "r2": 1 - sq_error / (centered @ centered),
+        "mean": residuals.mean(),
+        "std": residuals.std(),
+        "q1": q1,
+        "q3": q3,
+    }
+
+
+def figure2_scatter_plot(predictions, targets, output_path="figures/fig2_scatter.pdf",
+                         stats=None):
     """Figure 2: Prediction vs Ground Truth Scatter Plot"""
-    fig, ax = plt.subplots(figsize=(6, 6))
+    if stats is None:
+        stats = compute_stats(predictions, targets)
+    fig, ax = reusable_figure((6, 6))
     
-    # Calculate errors for coloring
-    errors = np.abs(predictions - targets)
+    # Errors for coloring
+    errors = stats["abs_errors"]
     
     # Create scatter plot with color by error
     scatter = ax.scatter(targets, predictions, c=errors, cmap='RdYlGn_r', 
@@ -102,10 +173,8 @@ def figure2_scatter_plot(predictions, targets, output_path="figures/fig2_scatter
     ax.set_ylabel('Predicted Hours Until Sunset', fontweight='bold')
     ax.set_title('Prediction Accuracy', fontweight='bold', pad=15)
     
-    # Calculate and display metrics
-    mae = np.mean(np.abs(predictions - targets))
-    rmse = np.sqrt(np.mean((predictions - targets)**2))
-    r2 = 1 - np.sum((targets - predictions)**2) / np.sum((targets - targets.mean())**2)
+    # Display metrics
+    mae, rmse, r2 = stats["mae"], stats["rmse"], stats["r2"]
     
     # Add text box with metrics
     textstr = f'MAE: {mae:.2f} hours\nRMSE: {rmse:.2f} hours\nR²: {r2:.2f}'
@@ -114,25 +183,27 @@ def figure2_scatter_plot(predictions, targets, output_path="figures/fig2_scatter
            verticalalignment='top', bbox=props)
     
     # Colorbar
-    cbar = plt.colorbar(scatter, ax=ax)
+    cbar = fig.colorbar(scatter, ax=ax)
     cbar.set_label('Absolute Error (hours)', rotation=270, labelpad=20)
     
     ax.legend(loc='lower right', framealpha=0.9)
     ax.grid(True, alpha=0.3, linestyle='--')
     ax.set_aspect('equal', adjustable='box')
     
-    plt.tight_layout()
+    fig.tight_layout()
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_path, format='pdf')
+    fig.savefig(output_path, format='pdf')
     print(f"✓ Saved: {output_path}")
-    plt.close()
 
 
-def figure3_residual_plot(predictions, targets, output_path="figures/fig3_residuals.pdf"):
+def figure3_residual_plot(predictions, targets, output_path="figures/fig3_residuals.pdf",
+                          stats=None):
     """Figure 3: Residual Plot"""
-    fig, ax = plt.subplots(figsize=(7, 5))
+    if stats is None:
+        stats = compute_stats(predictions, targets)
+    fig, ax = reusable_figure((7, 5))
     
-    residuals = predictions - targets
+    residuals = stats["residuals"]
     
     # Scatter plot
     ax.scatter(targets, residuals, alpha=0.6, s=50, c='steelblue', 
@@ -142,12 +213,12 @@ def figure3_residual_plot(predictions, targets, output_path="figures/fig3_residu
     ax.axhline(y=0, color='r', linestyle='--', linewidth=2, label='Zero Error')
     
     # Mean residual line
-    mean_residual = residuals.mean()
+    mean_residual = stats["mean"]
     ax.axhline(y=mean_residual, color='orange', linestyle='--', 
               linewidth=1.5, label=f'Mean: {mean_residual:.3f}')
     
     # ±1 std dev bands
-    std_residual = residuals.std()
+    std_residual = stats["std"]
     ax.axhspan(-std_residual, std_residual, alpha=0.2, color='gray', 
               label=f'±1σ: {std_residual:.2f}')
     
@@ -157,25 +228,28 @@ def figure3_residual_plot(predictions, targets, output_path="figures/fig3_residu
     ax.legend(loc='best', framealpha=0.9)
     ax.grid(True, alpha=0.3, linestyle='--')
     
-    plt.tight_layout()
+    fig.tight_layout()
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_path, format='pdf')
+    fig.savefig(output_path, format='pdf')
     print(f"✓ Saved: {output_path}")
-    plt.close()
 
 
-def figure4_error_histogram(predictions, targets, output_path="figures/fig4_histogram.pdf"):
+def figure4_error_histogram(predictions, targets, output_path="figures/fig4_histogram.pdf",
+                            stats=None):
     """Figure 4: Error Distribution Histogram"""
-    fig, ax = plt.subplots(figsize=(7, 5))
+    if stats is None:
+        stats = compute_stats(predictions, targets)
+    fig, ax = reusable_figure((7, 5))
     
-    errors = predictions - targets
+    errors = stats["residuals"]
     
-    # Histogram
-    n, bins, patches = ax.hist(errors, bins=30, edgecolor='black', 
-                              linewidth=1.2, alpha=0.7, color='steelblue')
+    # Histogram: bin once with NumPy and draw a single artist instead of 30 patches
+    counts, bins = np.histogram(errors, bins=30)
+    ax.stairs(counts, bins, fill=True, facecolor='steelblue', edgecolor='black',
+              linewidth=1.2, alpha=0.7)
     
     # Overlay normal distribution
-    mu, sigma = errors.mean(), errors.std()
+    mu, sigma = stats["mean"], stats["std"]
     x = np.linspace(errors.min(), errors.max(), 100)
     normal = (1 / (sigma * np.sqrt(2 * np.pi))) * np.exp(-0.5 * ((x - mu) / sigma)**2)
     normal = normal * len(errors) * (bins[1] - bins[0])  # Scale to match histogram
@@ -183,10 +257,10 @@ def figure4_error_histogram(predictions, targets, output_path="figures/fig4_hist
     
     # Vertical lines for mean and percentiles
     ax.axvline(mu, color='red', linestyle='--', linewidth=2, label=f'Mean: {mu:.3f}')
-    ax.axvline(np.percentile(errors, 25), color='orange', linestyle=':', 
-              linewidth=1.5, label=f'Q1: {np.percentile(errors, 25):.3f}')
-    ax.axvline(np.percentile(errors, 75), color='orange', linestyle=':', 
-              linewidth=1.5, label=f'Q3: {np.percentile(errors, 75):.3f}')
+    ax.axvline(stats["q1"], color='orange', linestyle=':', 
+              linewidth=1.5, label=f'Q1: {stats["q1"]:.3f}')
+    ax.axvline(stats["q3"], color='orange', linestyle=':', 
+              linewidth=1.5, label=f'Q3: {stats["q3"]:.3f}')
     
     ax.set_xlabel('Prediction Error (hours)', fontweight='bold')
     ax.set_ylabel('Frequency', fontweight='bold')
@@ -194,11 +268,10 @@ def figure4_error_histogram(predictions, targets, output_path="figures/fig4_hist
     ax.legend(loc='best', framealpha=0.9)
     ax.grid(True, alpha=0.3, linestyle='--', axis='y')
     
-    plt.tight_layout()
+    fig.tight_layout()
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_path, format='pdf')
+    fig.savefig(output_path, format='pdf')
     print(f"✓ Saved: {output_path}")
-    plt.close()
 
 
 def figure5_example_predictions(metadata, predictions, targets, image_dir, 
@@ -224,7 +297,8 @@ def figure5_example_predictions(metadata, predictions, targets, image_dir,
             img_path = Path(image_dir) / img_path
         
         try:
-            img = Image.open(img_path).convert("RGB")
+            # Each panel is ~3 in wide; don't decode full-resolution frames
+            img = fast_open(img_path, (800, 800))
             ax.imshow(img)
         except:
             ax.text(0.5, 0.5, "Image not found", ha='center', va='center')
@@ -270,21 +344,16 @@ def figure5_example_predictions(metadata, predictions, targets, image_dir,
 def figure7_temporal_performance(metadata, predictions, targets, 
                                output_path="figures/fig7_temporal.pdf"):
     """Figure 7: Temporal Performance Over Time"""
-    fig, ax = plt.subplots(figsize=(12, 5))
-    
-    # Group by date and calculate MAE
-    date_mae = defaultdict(list)
-    dates = []
+    fig, ax = reusable_figure((12, 5))
     
-    for i, item in enumerate(metadata):
-        date = datetime.fromisoformat(item["capture_time"]).date()
-        error = abs(predictions[i] - targets[i])
-        date_mae[date].append(error)
-        dates.append(date)
-    
-    # Calculate daily MAE
-    unique_dates = sorted(set(dates))
-    daily_mae = [np.mean(date_mae[date]) for date in unique_dates]
+    # Group by date and calculate daily MAE with bincount over day indices.
+    # capture_time is local ISO time, so its first 10 chars are the local
+    # date (parsing the offset with datetime64 would shift days to UTC).
+    days = np.array([item["capture_time"][:10] for item in metadata],
+                    dtype='datetime64[D]')
+    errors = np.abs(predictions - targets)
+    unique_dates, day_idx = np.unique(days, return_inverse=True)
+    daily_mae = np.bincount(day_idx, weights=errors) / np.bincount(day_idx)
     
     # Plot
     ax.plot(unique_dates, daily_mae, 'o-', markersize=4, linewidth=1.5, 
@@ -312,11 +381,10 @@ def figure7_temporal_performance(metadata, predictions, targets,
     # Format x-axis dates
     fig.autofmt_xdate()
     
-    plt.tight_layout()
+    fig.tight_layout()
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_path, format='pdf')
+    fig.savefig(output_path, format='pdf')
     print(f"✓ Saved: {output_path}")
-    plt.close()
 
 
 def figure8_model_comparison(output_path="figures/fig8_comparison.pdf"):
@@ -330,7 +398,7 @@ def figure8_model_comparison(output_path="figures/fig8_comparison.pdf"):
     x = np.arange(len(models))
     width = 0.25
     
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = reusable_figure((10, 6))
     
     bars1 = ax.bar(x - width, mae_values, width, label='MAE', 
                    color='steelblue', edgecolor='black', linewidth=1.2)
@@ -355,11 +423,10 @@ def figure8_model_comparison(output_path="figures/fig8_comparison.pdf"):
     ax.grid(True, alpha=0.3, linestyle='--', axis='y')
     ax.set_ylim([0, max(max(mae_values), max(rmse_values), max(r2_values)) * 1.15])
     
-    plt.tight_layout()
+    fig.tight_layout()
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(output_path, format='pdf')
+    fig.savefig(output_path, format='pdf')
     print(f"✓ Saved: {output_path}")
-    plt.close()
 
 
 def main():
@@ -372,21 +439,46 @@ def main():
     metadata_file = "data/processed/test_metadata.json"
     image_dir = "data/synthetic_images"
     
+    # Figures only need regenerating when their inputs or the code that
+    # produces them (this script, the model and its data pipeline) change
+    script_path = Path(__file__)
+    code_inputs = (script_path,) + tuple(
+        script_path.with_name(name)
+        for name in ("model.py", "dataset_builder.py", "image_utils.py"))
+    
     if checkpoint_path.exists() and Path(metadata_file).exists():
-        print("Loading model predictions...")
-        predictions, targets, image_paths, metadata = load_predictions(
-            metadata_file, checkpoint_path
-        )
-        
-        print(f"Loaded {len(predictions)} predictions")
-        print("\nGenerating figures...")
+        inputs = (checkpoint_path, metadata_file) + code_inputs
+        stale = {name: is_stale(f"figures/{name}.pdf", *inputs)
+                 for name in ["fig2_scatter", "fig3_residuals", "fig4_histogram",
+                              "fig7_temporal"]}
+        # fig5 also shows the images themselves; the directory's mtime
+        # changes when images are added, removed or replaced by rename
+        fig5_inputs = inputs + ((image_dir,) if Path(image_dir).exists() else ())
+        stale["fig5_examples"] = is_stale("figures/fig5_examples.pdf", *fig5_inputs)
         
-        # Generate figures
-        figure2_scatter_plot(predictions, targets)
-        figure3_residual_plot(predictions, targets)
-        figure4_error_histogram(predictions, targets)
-        figure5_example_predictions(metadata, predictions, targets, image_dir)
-        figure7_temporal_performance(metadata, predictions, targets)
+        if not any(stale.values()):
+            print("✓ Model figures are up to date, skipping inference")
+        else:
+            print("Loading model predictions...")
+            predictions, targets, image_paths, metadata = load_predictions(
+                metadata_file, checkpoint_path
+            )
+            
+            print(f"Loaded {len(predictions)} predictions")
+            print("\nGenerating figures...")
+            
+            # Generate figures
+            stats = compute_stats(predictions, targets)
+            if stale["fig2_scatter"]:
+                figure2_scatter_plot(predictions, targets, stats=stats)
+            if stale["fig3_residuals"]:
+                figure3_residual_plot(predictions, targets, stats=stats)
+            if stale["fig4_histogram"]:
+                figure4_error_histogram(predictions, targets, stats=stats)
+            if stale["fig5_examples"]:
+                figure5_example_predictions(metadata, predictions, targets, image_dir)
+            if stale["fig7_temporal"]:
+                figure7_temporal_performance(metadata, predictions, targets)
         
     else:
         print("⚠ Checkpoint or metadata not found. Generating example figures...")
@@ -395,18 +487,22 @@ def main():
         targets = np.random.uniform(2.5, 3.5, 100)
         predictions = targets + np.random.normal(0, 0.3, 100)
         
-        figure2_scatter_plot(predictions, targets)
-        figure3_residual_plot(predictions, targets)
-        figure4_error_histogram(predictions, targets)
+        stats = compute_stats(predictions, targets)
+        if is_stale("figures/fig2_scatter.pdf", *code_inputs):
+            figure2_scatter_plot(predictions, targets, stats=stats)
+        if is_stale("figures/fig3_residuals.pdf", *code_inputs):
+            figure3_residual_plot(predictions, targets, stats=stats)
+        if is_stale("figures/fig4_histogram.pdf", *code_inputs):
+            figure4_error_histogram(predictions, targets, stats=stats)
     
     # Model comparison (uses example data)
-    figure8_model_comparison()
+    if is_stale("figures/fig8_comparison.pdf", *code_inputs):
+        figure8_model_comparison()
     
     print("\n" + "=" * 60)
     print("✓ All figures generated!")
     print("Check the 'figures/' directory for PDF files.")
 
-
 if __name__ == "__main__":
     main()
 
@@ -6,13 +6,18 @@ Shows what parts of images the model focuses on for predictions.
 import torch
 import torch.nn.functional as F
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from matplotlib import cm
 from PIL import Image
-import cv2
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import hashlib
 import json
 
+plt.ioff()
 plt.rcParams.update({
     'font.size': 11,
     'figure.dpi': 300,
@@ -20,6 +25,9 @@ plt.rcParams.update({
     'savefig.bbox': 'tight'
 })
 
+# Jet colormap as a uint8 lookup table, indexed directly by the uint8 CAM
+JET_LUT = (cm.jet(np.arange(256))[:, :3] * 255).astype(np.uint8)
+
 
 class GradCAM:
     """Grad-CAM implementation for visualizing model attention."""
@@ -27,83 +35,207 @@ class GradCAM:
     def __init__(self, model, target_layer):
         self.model = model
         self.target_layer = target_layer
-        self.gradients = None
         self.activations = None
         
-        # Register hooks
+        # Register hook (gradients are taken directly w.r.t. these activations)
         self.target_layer.register_forward_hook(self.save_activation)
-        self.target_layer.register_full_backward_hook(self.save_gradient)
     
     def save_activation(self, module, input, output):
+        # With frozen weights nothing upstream requires grad, so make the
+        # activations the leaf that the backward pass starts from
+        if not output.requires_grad:
+            output.requires_grad_()
         self.activations = output
     
-    def save_gradient(self, module, grad_input, grad_output):
-        self.gradients = grad_output[0]
-    
     def generate_cam(self, input_image, class_idx=None):
-        """Generate class activation map."""
-        self.model.eval()
-        
-        # Forward pass
-        output = self.model(input_image)
+        """Generate class activation map for a single (1, 3, H, W) image.
         
-        if class_idx is None:
-            class_idx = output.argmax(dim=1)
+        class_idx is unused: the model is a single-output regressor.
+        """
+        cams, predictions = self.generate_cam_batch(input_image)
+        return cams[0].cpu().numpy(), float(predictions[0])
+    
+    def generate_cam_batch(self, input_batch):
+        """Generate class activation maps for a batch of images in one forward/backward pass.
         
-        # Backward pass
-        self.model.zero_grad()
-        output.backward(gradient=torch.ones_like(output), retain_graph=True)
+        Returns the (N, H, W) maps as a tensor on the model's device, and the predictions.
+        """
+        self.model.eval()
         
-        # Get gradients and activations
-        gradients = self.gradients[0].cpu().data.numpy()
-        activations = self.activations[0].cpu().data.numpy()
+        # bfloat16 autocast on GPUs that support it (CAMs are ReLU'd and
+        # normalized, so they tolerate the precision); CPU stays float32
+        use_bf16 = input_batch.is_cuda and torch.cuda.is_bf16_supported()
+        with torch.autocast(device_type=input_batch.device.type, dtype=torch.bfloat16,
+                            enabled=use_bf16):
+            # Forward pass
+            output = self.model(input_batch)
+            
+            # Gradient w.r.t. the target activations only (samples are independent
+            # in eval mode, so the summed output gives each sample its own gradient)
+            gradients = torch.autograd.grad(output.sum(), self.activations)[0]
         
-        # Calculate weights (global average pooling of gradients)
-        weights = np.mean(gradients, axis=(1, 2))
+        # Reduce in float32
+        gradients = gradients.float()
+        activations = self.activations.detach().float()
+        output = output.float()
         
-        # Generate CAM
-        cam = np.zeros(activations.shape[1:], dtype=np.float32)
-        for i, w in enumerate(weights):
-            cam += w * activations[i]
+        # Calculate weights (global average pooling of gradients), per sample
+        weights = gradients.mean(dim=(2, 3))
         
-        # Apply ReLU
-        cam = np.maximum(cam, 0)
+        # Generate CAM (weighted sum over channels) and apply ReLU
+        cam = torch.einsum('nc,nchw->nhw', weights, activations).relu_()
         
-        # Normalize
-        cam = cam / (cam.max() + 1e-8)
+        # Normalize each sample
+        cam = cam / (cam.amax(dim=(1, 2), keepdim=True) + 1e-8)
         
-        return cam, output.item()
+        return cam, output.detach().cpu().numpy()
+
+
+def upsample_cam(cam, size):
+    """Bilinearly resize an (H, W) CAM tensor to size=(width, height) on its device, as uint8."""
+    width, height = size
+    cam_up = F.interpolate(cam[None, None], size=(height, width),
+                           mode='bilinear', align_corners=False)[0, 0]
+    return cam_up.mul_(255).clamp_(0, 255).to(torch.uint8).cpu().numpy()
+
+
+def find_target_layer(model):
+    """Return the last Conv2d of the ResNet's layer4 (the Grad-CAM target), or None."""
+    layer4 = getattr(getattr(model, "backbone", None), "layer4", None)
+    if layer4 is not None:
+        # Known architecture: the last conv of the last block, found directly
+        for module in reversed(list(layer4[-1].modules())):
+            if isinstance(module, torch.nn.Conv2d):
+                return module
+        # Fallback: use last layer before adaptive pool
+        return list(layer4.children())[-1]
+    
+    # Unknown architecture: scan for the last conv in any layer4
+    target_layer = None
+    for name, module in model.named_modules():
+        if 'layer4' in name and isinstance(module, torch.nn.Conv2d):
+            target_layer = module
+    return target_layer
+
+
+def compile_upstream_layers(model):
+    """torch.compile the ResNet stages before layer4, which need neither hooks nor gradients.
+    
+    The hooked layer itself stays eager: compiling it would capture the activations
+    inside the compiled graph, where autograd.grad can no longer reach them.
+    """
+    backbone = getattr(model, "backbone", None)
+    if backbone is None or not hasattr(torch, "compile"):
+        return model
+    for name in ("layer1", "layer2", "layer3"):
+        setattr(backbone, name, torch.compile(getattr(backbone, name), dynamic=False))
+    return model
+
+
+def quantize_upstream_layers(model, calibration_batch):
+    """Statically quantize the ResNet stem and layer1-3 to int8 (CPU only).
+    
+    Quantized ops have no autograd, which is fine here: Grad-CAM only needs
+    gradients from the output back to layer4, so everything upstream of it
+    can run in int8. Calibrated on the batch that is about to be explained.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+    
+    backbone = model.backbone
+    upstream = torch.nn.Sequential(backbone.conv1, backbone.bn1, backbone.relu,
+                                   backbone.maxpool, backbone.layer1,
+                                   backbone.layer2, backbone.layer3).eval()
+    prepared = prepare_fx(upstream, get_default_qconfig_mapping("x86"),
+                          example_inputs=(calibration_batch,))
+    with torch.no_grad():
+        prepared(calibration_batch)
+    
+    # ResNet.forward calls these in order, so route them all through the int8 stem
+    backbone.conv1 = convert_fx(prepared)
+    for name in ("bn1", "relu", "maxpool", "layer1", "layer2", "layer3"):
+        setattr(backbone, name, torch.nn.Identity())
+    return model
+
+
+def load_preprocessed(img, img_path, transform, cache_dir=Path("figures/.cache")):
+    """Return transform(img), reusing a tensor cached on disk for this path/mtime/transform."""
+    key = f"{Path(img_path).resolve()}:{Path(img_path).stat().st_mtime_ns}:{transform!r}"
+    cache_path = cache_dir / f"{hashlib.sha1(key.encode()).hexdigest()}.pt"
+    if cache_path.exists():
+        return torch.load(cache_path, map_location='cpu', weights_only=True)
+    
+    tensor = transform(img)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    torch.save(tensor, cache_path)
+    return tensor
+
+
+def _load_samples(metadata, image_dir, n):
+    """Decode n evenly spaced samples in parallel (Pillow releases the GIL while decoding).
+    
+    Returns (idx, img, img_path) per column; img is None if the image could not be opened.
+    """
+    indices = np.linspace(0, len(metadata)-1, n, dtype=int)
+    img_paths = []
+    for idx in indices:
+        img_path = Path(metadata[idx]["image_path"])
+        if not img_path.is_absolute():
+            img_path = Path(image_dir) / img_path
+        img_paths.append(img_path)
+    
+    def open_rgb(idx, img_path):
+        try:
+            return Image.open(img_path).convert("RGB")
+        except Exception as e:
+            print(f"Error processing image {idx}: {e}")
+            return None
+    
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        images = list(executor.map(open_rgb, indices, img_paths))
+    return list(zip(indices, images, img_paths))
 
 
 def create_gradcam_figure(model, metadata, checkpoint_path, image_dir, 
-                         output_path="figures/fig9_gradcam.pdf", num_samples=6):
-    """Create Grad-CAM visualization figure."""
+                         output_path="figures/fig9_gradcam.pdf", num_samples=6,
+                         compile_model=False, quantize=False, save_tiles=False):
+    """Create Grad-CAM visualization figure.
+    
+    compile_model: torch.compile the upstream backbone stages (pays off for
+    large num_samples; compile time dominates for a handful of images).
+    quantize: run the upstream backbone stages in int8 on CPU (maps may shift slightly).
+    save_tiles: also write each overlay as a standalone PNG in <output>_tiles/.
+    """
     from model import create_model
     from torchvision import transforms
     
-    # Load model
-    checkpoint = torch.load(checkpoint_path, map_location='cpu', weights_only=False)
+    # Load model (on GPU when available; cuDNN autotunes the fixed input shape)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    torch.backends.cudnn.benchmark = True
+    checkpoint = torch.load(checkpoint_path, map_location=device, weights_only=False)
     model.load_state_dict(checkpoint["model_state_dict"])
-    model.eval()
+    model.to(device).eval()
+    # Only d(output)/d(activations) is needed; frozen weights keep autograd
+    # from building and walking the parameter-gradient edges
+    model.requires_grad_(False)
     
-    # Get target layer (last conv layer in ResNet)
-    target_layer = None
-    for name, module in model.named_modules():
-        if 'layer4' in name and isinstance(module, torch.nn.Conv2d):
-            target_layer = module
+    quantize = quantize and device.type == "cpu"
+    if compile_model or quantize:
+        # Swapping in compiled/int8 stages is for this figure only; work on a
+        # copy so the caller's model is left as it was
+        model = copy.deepcopy(model)
     
-    if target_layer is None:
-        # Fallback: use last layer before adaptive pool
-        for name, module in model.named_modules():
-            if 'backbone.layer4' in name:
-                target_layer = list(model.backbone.layer4.children())[-1]
-                break
+    # Get target layer (last conv layer in ResNet)
+    target_layer = find_target_layer(model)
     
     if target_layer is None:
         print("⚠ Could not find target layer for Grad-CAM. Creating simplified figure.")
         create_simplified_attention_figure(metadata, image_dir, output_path, num_samples)
         return
     
+    if compile_model and not quantize:
+        compile_upstream_layers(model)
+    
     # Initialize Grad-CAM
     gradcam = GradCAM(model, target_layer)
     
@@ -116,44 +248,63 @@ def create_gradcam_figure(model, metadata, checkpoint_path, image_dir,
     ])
     
     # Select diverse samples
-    indices = np.linspace(0, len(metadata)-1, num_samples, dtype=int)
+    samples = _load_samples(metadata, image_dir, num_samples)
     
     fig, axes = plt.subplots(2, num_samples, figsize=(18, 6))
     if num_samples == 1:
         axes = axes.reshape(2, 1)
     
-    for col, idx in enumerate(indices):
-        # Load image
-        img_path = Path(metadata[idx]["image_path"])
-        if not img_path.is_absolute():
-            img_path = Path(image_dir) / img_path
-        
+    # Per-sample overlays can also be kept as standalone PNG tiles
+    if save_tiles:
+        tile_dir = Path(output_path).with_suffix("")
+        tile_dir = tile_dir.parent / f"{tile_dir.name}_tiles"
+        tile_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Load and preprocess all samples, then run Grad-CAM on them as one batch
+    images = {col: img for col, (_, img, _) in enumerate(samples) if img is not None}
+    image_paths = {col: samples[col][2] for col in images}
+    
+    cams, predictions = {}, {}
+    if images:
+        cols = list(images)
+        batch = torch.stack([load_preprocessed(images[col], image_paths[col], transform)
+                             for col in cols]).to(device, non_blocking=True)
+        if quantize:
+            quantize_upstream_layers(model, batch)
+        batch_cams, batch_preds = gradcam.generate_cam_batch(batch)
+        cams = dict(zip(cols, batch_cams.unbind(0)))
+        predictions = dict(zip(cols, batch_preds))
+    
+    for col, (idx, _, _) in enumerate(samples):
         try:
-            img = Image.open(img_path).convert("RGB")
-            img_tensor = transform(img).unsqueeze(0)
+            img = images[col]
+            cam, prediction = cams[col], predictions[col]
             
-            # Generate CAM
-            cam, prediction = gradcam.generate_cam(img_tensor)
-            
-            # Resize CAM to original image size
-            cam_resized = cv2.resize(cam, img.size, interpolation=cv2.INTER_LINEAR)
-            cam_resized = np.uint8(255 * cam_resized)
-            heatmap = cm.jet(cam_resized)[:, :, :3]
+            # Resize CAM to original image size (only the uint8 result leaves the device)
+            cam_resized = upsample_cam(cam, img.size)
+            heatmap = JET_LUT[cam_resized]
             
             # Original image
-            axes[0, col].imshow(img)
+            # interpolation='none' lets the PDF embed the pixels as-is instead
+            # of resampling every image to the output dpi
+            axes[0, col].imshow(img, interpolation='none')
             axes[0, col].axis('off')
             axes[0, col].set_title(f'Sample {col+1}', fontweight='bold')
             
             # Overlay heatmap
-            img_array = np.array(img) / 255.0
-            overlay = 0.6 * img_array + 0.4 * heatmap
-            axes[1, col].imshow(overlay)
+            # 0.6/0.4 blend in 8.8 fixed point (154 + 102 = 256), no float image
+            overlay = ((np.asarray(img, dtype=np.uint16) * 154
+                        + heatmap.astype(np.uint16) * 102) >> 8).astype(np.uint8)
+            if save_tiles:
+                Image.fromarray(overlay).save(tile_dir / f"overlay_{col+1}.png",
+                                              optimize=False, compress_level=1)
+            axes[1, col].imshow(overlay, interpolation='none')
             axes[1, col].axis('off')
             axes[1, col].set_title(f'Pred: {prediction:.2f}h', fontweight='bold')
             
         except Exception as e:
-            print(f"Error processing image {idx}: {e}")
+            if col in images:
+                print(f"Error processing image {idx}: {e}")
             axes[0, col].text(0.5, 0.5, "Error", ha='center', va='center')
             axes[1, col].text(0.5, 0.5, "Error", ha='center', va='center')
     
@@ -171,15 +322,8 @@ def create_simplified_attention_figure(metadata, image_dir, output_path, num_sam
     """Create simplified attention figure when Grad-CAM unavailable."""
     fig, axes = plt.subplots(2, num_samples, figsize=(18, 6))
     
-    indices = np.linspace(0, len(metadata)-1, num_samples, dtype=int)
-    
-    for col, idx in enumerate(indices):
-        img_path = Path(metadata[idx]["image_path"])
-        if not img_path.is_absolute():
-            img_path = Path(image_dir) / img_path
-        
+    for col, (_, img, _) in enumerate(_load_samples(metadata, image_dir, num_samples)):
         try:
-            img = Image.open(img_path).convert("RGB")
             axes[0, col].imshow(img)
             axes[0, col].axis('off')
             axes[0, col].set_title(f'Sample {col+1}', fontweight='bold')
@@ -9,8 +9,9 @@ import matplotlib.pyplot as plt
 import numpy as np
 import json
 import pandas as pd
+from functools import lru_cache
 from pathlib import Path
-from scipy.stats import pearsonr, ttest_ind
+from scipy.stats import t as t_dist
 import seaborn as sns
 
 # Set style
@@ -19,21 +20,43 @@ plt.rcParams['figure.dpi'] = 300
 plt.rcParams['savefig.dpi'] = 300
 plt.rcParams['font.size'] = 10
 
-def create_figure_18_sweet_spot_scatter():
+ANALYSIS_FILE = Path("data/training/high_cloud_sweet_spot_analysis.json")
+
+@lru_cache(maxsize=1)
+def _load_analysis(path, mtime_ns):
+    """Parse the analysis JSON and tabulate its per-day records (cached per path/mtime)."""
+    with open(path, "r") as f:
+        analysis = json.load(f)
+    return analysis, pd.json_normalize(analysis["data"])
+
+def load_sweet_spot_analysis(path=ANALYSIS_FILE):
+    """Return (analysis, DataFrame of analysis["data"]), or (None, None) if missing."""
+    path = Path(path)
+    if not path.exists():
+        return None, None
+    return _load_analysis(path, path.stat().st_mtime_ns)
+
+def pearson_r(x, y):
+    """Pearson r and two-sided p-value via np.corrcoef (skips pearsonr's input validation)."""
+    n = len(x)
+    r = float(np.clip(np.corrcoef(x, y)[0, 1], -1.0, 1.0))
+    if abs(r) == 1.0:
+        return r, 0.0
+    t_stat = abs(r) * np.sqrt((n - 2) / (1 - r * r))
+    return r, float(2 * t_dist.sf(t_stat, n - 2))
+
+def create_figure_18_sweet_spot_scatter(analysis=None, df=None):
     """Figure 18: Cloud cover vs quality with sweet spot highlighted."""
-    # Load analysis results
-    analysis_file = Path("data/training/high_cloud_sweet_spot_analysis.json")
-    if not analysis_file.exists():
+    # Load analysis results (unless the caller already has them)
+    if analysis is None:
+        analysis, df = load_sweet_spot_analysis()
+    if analysis is None:
         print("⚠ No sweet spot analysis found")
         return
     
-    with open(analysis_file, "r") as f:
-        analysis = json.load(f)
-    
-    data = analysis["data"]
-    cloud_cover = np.array([d["cloud_cover"] for d in data])
-    quality = np.array([d["quality"] for d in data])
-    in_sweet_spot = np.array([d["in_sweet_spot"] for d in data])
+    cloud_cover = df["cloud_cover"].to_numpy()
+    quality = df["quality"].to_numpy()
+    in_sweet_spot = df["in_sweet_spot"].to_numpy(dtype=bool)
     
     fig, ax = plt.subplots(figsize=(8, 6))
     
@@ -49,7 +72,7 @@ def create_figure_18_sweet_spot_scatter():
     ax.axvspan(5, 80, alpha=0.2, color='green', label='Sweet spot range')
     
     # Add correlation
-    corr, p_val = pearsonr(cloud_cover, quality)
+    corr, p_val = pearson_r(cloud_cover, quality)
     ax.text(0.05, 0.95, f'r = {corr:.3f}\np = {p_val:.3f}',
             transform=ax.transAxes, fontsize=11,
             verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
@@ -76,26 +99,26 @@ def create_figure_18_sweet_spot_scatter():
     plt.close()
     print(f"✓ Figure 18: Sweet spot scatter (r={corr:.3f}, p={p_val:.3f})")
 
-def create_figure_19_sweet_spot_comparison():
+def create_figure_19_sweet_spot_comparison(analysis=None, df=None):
     """Figure 19: Comparison of quality distributions in vs out of sweet spot."""
-    analysis_file = Path("data/training/high_cloud_sweet_spot_analysis.json")
-    if not analysis_file.exists():
+    if analysis is None:
+        analysis, df = load_sweet_spot_analysis()
+    if analysis is None:
         return
     
-    with open(analysis_file, "r") as f:
-        analysis = json.load(f)
-    
-    data = analysis["data"]
-    quality = np.array([d["quality"] for d in data])
-    in_sweet_spot = np.array([d["in_sweet_spot"] for d in data])
+    quality = df["quality"].to_numpy()
+    in_sweet_spot = df["in_sweet_spot"].to_numpy(dtype=bool)
     
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
     
-    # Histogram comparison
-    ax1.hist(quality[in_sweet_spot], bins=15, alpha=0.6, label='In sweet spot', 
-            color='green', edgecolor='black', density=True)
-    ax1.hist(quality[~in_sweet_spot], bins=15, alpha=0.6, label='Outside sweet spot',
-            color='red', edgecolor='black', density=True)
+    # Histogram comparison (shared bin edges so the two densities line up)
+    edges = np.histogram_bin_edges(quality, bins=15)
+    density_in, _ = np.histogram(quality[in_sweet_spot], bins=edges, density=True)
+    density_out, _ = np.histogram(quality[~in_sweet_spot], bins=edges, density=True)
+    ax1.stairs(density_in, edges, fill=True, alpha=0.6, label='In sweet spot',
+               facecolor='green', edgecolor='black')
+    ax1.stairs(density_out, edges, fill=True, alpha=0.6, label='Outside sweet spot',
+               facecolor='red', edgecolor='black')
     ax1.set_xlabel('Sunset Quality Score', fontsize=12, fontweight='bold')
     ax1.set_ylabel('Density', fontsize=12, fontweight='bold')
     ax1.set_title('Quality Distribution Comparison', fontsize=12, fontweight='bold')
@@ -132,38 +155,29 @@ def create_figure_19_sweet_spot_comparison():
     plt.close()
     print(f"✓ Figure 19: Sweet spot comparison (p={p_val:.3f})")
 
-def create_figure_20_cloud_cover_prediction():
+def create_figure_20_cloud_cover_prediction(analysis=None, df=None):
     """Figure 20: Using cloud cover as predictor."""
-    analysis_file = Path("data/training/high_cloud_sweet_spot_analysis.json")
-    if not analysis_file.exists():
+    if analysis is None:
+        analysis, df = load_sweet_spot_analysis()
+    if analysis is None:
         return
     
-    with open(analysis_file, "r") as f:
-        analysis = json.load(f)
-    
-    data = analysis["data"]
-    cloud_cover = np.array([d["cloud_cover"] for d in data])
-    quality = np.array([d["quality"] for d in data])
-    peak_time = np.array([d["peak_time"] for d in data])
-    duration = np.array([d["duration"] for d in data])
+    cloud_cover = df["cloud_cover"].to_numpy()
+    quality = df["quality"].to_numpy()
+    peak_time = df["peak_time"].to_numpy()
+    duration = df["duration"].to_numpy()
     
     # Simple prediction: if in sweet spot, predict higher quality
     # Use a simple linear model based on sweet spot
     sweet_spot_mask = (cloud_cover >= 5) & (cloud_cover <= 80)
     
-    # Predictions: simple rule-based
-    pred_quality = np.where(sweet_spot_mask, 
-                           analysis["quality"]["in_sweet_spot"]["mean"],
-                           analysis["quality"]["outside"]["mean"])
-    
-    # For peak time and duration, use mean of sweet spot vs outside
-    pred_peak = np.where(sweet_spot_mask,
-                        analysis["peak_time"]["in_sweet_spot"]["mean"],
-                        analysis["peak_time"]["outside"]["mean"])
-    
-    pred_duration = np.where(sweet_spot_mask,
-                            analysis["duration"]["in_sweet_spot"]["mean"],
-                            analysis["duration"]["outside"]["mean"])
+    # Predictions: simple rule-based, using the sweet spot vs outside mean
+    # for quality, peak time and duration; one select fills all three columns
+    targets = ("quality", "peak_time", "duration")
+    means_in = np.array([analysis[k]["in_sweet_spot"]["mean"] for k in targets])
+    means_out = np.array([analysis[k]["outside"]["mean"] for k in targets])
+    preds = np.where(sweet_spot_mask[:, None], means_in, means_out)
+    pred_quality, pred_peak, pred_duration = preds.T
     
     fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 5))
     
@@ -171,7 +185,7 @@ def create_figure_20_cloud_cover_prediction():
     ax1.scatter(quality, pred_quality, alpha=0.6, s=60, c='steelblue', 
                edgecolors='black', linewidth=0.5)
     ax1.plot([0, 10], [0, 10], 'r--', linewidth=2, label='Perfect prediction')
-    corr_q, p_val_q = pearsonr(quality, pred_quality)
+    corr_q, p_val_q = pearson_r(quality, pred_quality)
     mae_q = np.mean(np.abs(quality - pred_quality))
     ax1.text(0.05, 0.95, f'MAE = {mae_q:.2f}\nr = {corr_q:.3f}\np = {p_val_q:.3f}',
             transform=ax1.transAxes, fontsize=10,
@@ -190,7 +204,7 @@ def create_figure_20_cloud_cover_prediction():
     ax2.scatter(peak_time, pred_peak, alpha=0.6, s=60, c='coral',
                edgecolors='black', linewidth=0.5)
     ax2.plot([-peak_range, peak_range], [-peak_range, peak_range], 'r--', linewidth=2)
-    corr_p, p_val_p = pearsonr(peak_time, pred_peak)
+    corr_p, p_val_p = pearson_r(peak_time, pred_peak)
     mae_p = np.mean(np.abs(peak_time - pred_peak))
     ax2.text(0.05, 0.95, f'MAE = {mae_p:.2f} min\nr = {corr_p:.3f}\np = {p_val_p:.3f}',
             transform=ax2.transAxes, fontsize=10,
@@ -207,7 +221,7 @@ def create_figure_20_cloud_cover_prediction():
     ax3.scatter(duration, pred_duration, alpha=0.6, s=60, c='mediumseagreen',
                edgecolors='black', linewidth=0.5)
     ax3.plot([0, max_duration], [0, max_duration], 'r--', linewidth=2)
-    corr_d, p_val_d = pearsonr(duration, pred_duration)
+    corr_d, p_val_d = pearson_r(duration, pred_duration)
     mae_d = np.mean(np.abs(duration - pred_duration))
     ax3.text(0.05, 0.95, f'MAE = {mae_d:.2f} min\nr = {corr_d:.3f}\np = {p_val_d:.3f}',
             transform=ax3.transAxes, fontsize=10,
@@ -229,9 +243,11 @@ if __name__ == "__main__":
     print("GENERATING HIGH-LEVEL CLOUD FIGURES")
     print("=" * 70)
     
-    create_figure_18_sweet_spot_scatter()
-    create_figure_19_sweet_spot_comparison()
-    create_figure_20_cloud_cover_prediction()
+    # Load the analysis once and share it across all three figures
+    analysis, df = load_sweet_spot_analysis()
+    create_figure_18_sweet_spot_scatter(analysis, df)
+    create_figure_19_sweet_spot_comparison(analysis, df)
+    create_figure_20_cloud_cover_prediction(analysis, df)
     
     print("\n" + "=" * 70)
     print("✓ ALL HIGH-LEVEL CLOUD FIGURES GENERATED")
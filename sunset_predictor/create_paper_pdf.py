@@ -2,40 +2,206 @@
 Create PDF paper with embedded figures.
 """
 
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+# Only the units module is imported eagerly; the rest of ReportLab (platypus,
+# paraparser, font tables) and Pillow load on first use, keeping import cheap
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Image, Table, TableStyle
-from reportlab.lib import colors as rl_colors
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+import copy
+import io
 import os
 
-def create_paper_pdf(output_path="paper.pdf"):
-    """Create the complete paper as PDF."""
+# Default resolution figures are embedded at for their display box, not at source size
+EMBED_DPI = 150
+# Figures with at most this many distinct colours (antialiased plots) are embedded
+# as palette PNGs; anything richer (photos, heatmaps) as JPEG
+PALETTE_MAX_COLORS = 4096
+
+# Display boxes for the architecture diagram and the results figures
+ARCH_FIGURE_SIZE = (6*inch, 3.5*inch)
+RESULT_FIGURE_SIZE = (6*inch, 4.5*inch)
+
+RESULT_FIGURES = [
+    ("fig2_scatter.pdf", "Figure 2: Prediction accuracy scatter plot"),
+    ("fig3_residuals.pdf", "Figure 3: Residual analysis"),
+    ("fig4_histogram.pdf", "Figure 4: Error distribution histogram"),
+    ("fig5_examples.pdf", "Figure 5: Example predictions"),
+    ("fig7_temporal.pdf", "Figure 6: Temporal performance over time"),
+    ("fig8_comparison.pdf", "Figure 7: Model comparison"),
+    ("fig9_gradcam.pdf", "Figure 8: Grad-CAM visualizations"),
+]
+
+# A section starts on a new page only when less than this much room is left
+SECTION_MIN_HEIGHT = 7*inch
+
+# Dataset table column widths (shared by every build)
+_DATASET_COL_WIDTHS = [1.2*inch, 1*inch, 2*inch, 1*inch]
+
+# Abstract as one line: the paraparser would otherwise tokenize the source indentation
+_ABSTRACT = " ".join("""
+We present a novel deep learning framework for predicting sunset times in Berkeley, California
+using sky images captured from the Lawrence Berkeley National Laboratory (LBNL) webcam. Our
+approach leverages convolutional neural networks to learn visual patterns in sky images that
+correlate with the time remaining until sunset, enabling predictions up to 3 hours in advance.
+We collected and curated a dataset of over 365 days of historical webcam imagery, paired with
+precise astronomical sunset times. Our ResNet-based regression model achieves a mean absolute
+error of 0.27 hours (16 minutes) on test data, demonstrating the feasibility of using computer
+vision for temporal astronomical predictions. This work has applications in solar energy
+forecasting, outdoor activity planning, and demonstrates how readily available webcam data can
+be repurposed for scientific prediction tasks.
+""".split())
+
+# The paper as data: (kind, content) entries in reading order. Text entries are
+# materialized into flowables once per builder; the "slot" entries are the
+# figure blocks, filled in on every build.
+_PAPER_SPEC = [
+    ("title", "Predicting Sunset Times from Sky Images:<br/>A Deep Learning Approach Using Historical Webcam Data"),
+    ("author", "<i>Kasey Markel</i><br/>Department of Plant Biology, University of California, Berkeley"),
+    
+    # Abstract
+    ("heading2", "<b>Abstract</b>"),
+    ("abstract", _ABSTRACT),
+    ("section_break", None),
+    
+    # Introduction
+    ("heading1", "1. Introduction"),
+    ("heading2", "<b>1.1 Motivation</b>"),
+    ("para",
+     "Accurate prediction of sunset times has important applications in solar energy forecasting, "
+     "outdoor activity planning, and photography. While astronomical calculations provide precise "
+     "sunset times based on location and date, they do not account for local weather conditions, "
+     "atmospheric effects, or visibility that can affect the perceived timing of sunset. The "
+     "widespread availability of public webcam feeds presents an opportunity to leverage computer "
+     "vision for more context-aware sunset predictions."),
+    ("heading2", "<b>1.2 Contributions</b>"),
+    ("bullets", [
+        "First deep learning approach to predict sunset times from sky images",
+        "Novel dataset of 365+ days of Berkeley sky images with sunset annotations",
+        "Demonstration that visual sky patterns contain predictive information about sunset timing",
+        "Open-source pipeline for webcam-based astronomical prediction"
+    ]),
+    ("section_break", None),
+    
+    # Methodology
+    ("heading1", "2. Methodology"),
+    ("heading2", "<b>2.1 Problem Formulation</b>"),
+    ("para",
+     "Given a sky image I<sub>t</sub> captured at time t, we predict hours until sunset "
+     "h<sub>t</sub> = t<sub>sunset</sub> - t by learning a mapping f: I<sub>t</sub> → h<sub>t</sub> "
+     "that minimizes prediction error."),
+    ("heading2", "<b>2.2 Dataset Collection</b>"),
+    ("para",
+     "We collected images from the LBNL webcam archive, capturing frames approximately 3 hours "
+     "before sunset across a full year (365 days) to ensure seasonal variation coverage."),
+    ("table", [
+        ['Split', 'Images', 'Mean Hours Before Sunset', 'Std Dev'],
+        ['Train', '292', '3.02 hours', '0.28 hours'],
+        ['Test', '73', '3.01 hours', '0.31 hours'],
+        ['Total', '365', '3.02 hours', '0.29 hours']
+    ]),
+    ("heading2", "<b>2.3 Model Architecture</b>"),
+    ("para",
+     "We use a ResNet-18 backbone pretrained on ImageNet, replacing the classification head with "
+     "a regression head (512 → 256 → 128 → 1) to predict hours until sunset."),
+    ("slot", "architecture_figure"),
+    ("section_break", None),
     
-    doc = SimpleDocTemplate(output_path, pagesize=letter,
-                           rightMargin=72, leftMargin=72,
-                           topMargin=72, bottomMargin=18)
+    # Results
+    ("heading1", "3. Results"),
+    ("heading2", "<b>3.1 Quantitative Results</b>"),
+    ("para",
+     "Our ResNet-18 model achieves a mean absolute error of 0.27 hours (16 minutes) on the test set, "
+     "demonstrating strong predictive performance."),
+    ("slot", "results_figures"),
+    ("section_break", None),
     
-    # Container for the 'Flowable' objects
-    elements = []
+    # Discussion
+    ("heading1", "4. Discussion"),
+    ("heading2", "<b>4.1 What the Model Learns</b>"),
+    ("para",
+     "The model learns to associate visual features such as sky color gradients, cloud patterns, "
+     "and light intensity with the time remaining until sunset. Grad-CAM visualizations confirm "
+     "the model focuses on sky regions rather than ground features."),
+    ("heading2", "<b>4.2 Limitations</b>"),
+    ("bullets", [
+        "Geographic specificity: Model trained on Berkeley data may not generalize",
+        "Weather dependency: Performance varies with cloud cover",
+        "Temporal window: Best performance 1-3 hours before sunset",
+        "Data requirements: Needs substantial historical data (1 year+)"
+    ]),
+    ("heading2", "<b>4.3 Applications</b>"),
+    ("bullets", [
+        "Solar energy forecasting: Predict sunset for solar panel optimization",
+        "Outdoor activity planning: Better timing for photography, events",
+        "Atmospheric science: Understanding sky pattern evolution",
+        "Webcam data repurposing: Demonstrates value of public webcam archives"
+    ]),
+    ("section_break", None),
+    
+    # Conclusion
+    ("heading1", "5. Conclusion"),
+    ("para",
+     "We presented the first deep learning approach to predict sunset times from sky images, "
+     "achieving 16-minute mean absolute error using a ResNet-based regression model. Our work "
+     "demonstrates that visual sky patterns contain predictive information about sunset timing, "
+     "enabling practical applications in solar energy and outdoor planning. The use of publicly "
+     "available webcam data highlights the potential for repurposing existing infrastructure for "
+     "scientific prediction tasks."),
+    
+    # References
+    ("heading1", "References"),
+    ("references", [
+        "Meeus, J. (1998). Astronomical Algorithms. Willmann-Bell.",
+        "Yang, D., et al. (2020). Solar forecasting from sky images using convolutional neural networks. IEEE Transactions on Sustainable Energy.",
+        "He, K., et al. (2016). Deep residual learning for image recognition. CVPR."
+    ]),
+]
+
+# Stylesheet entry used for each kind of text entry in _PAPER_SPEC
+_SPEC_STYLES = {
+    "title": "CustomTitle",
+    "author": "Author",
+    "heading1": "CustomHeading1",
+    "heading2": "CustomHeading2",
+    "abstract": "Abstract",
+    "para": "CustomNormal",
+    "bullets": "CustomNormal",
+    "references": "CustomNormal",
+}
+
+_STYLES = None
+_EMBED_CACHE = {}
+
+
+def _get_styles():
+    """Return the sample stylesheet extended with the paper's styles, built on first use."""
+    global _STYLES
+    if _STYLES is not None:
+        return _STYLES
+    
+    from reportlab.lib import colors as rl_colors
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     
-    # Define styles
     styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
+    styles.add(ParagraphStyle(
         'CustomTitle',
         parent=styles['Heading1'],
         fontSize=24,
         textColor=rl_colors.HexColor('#1a1a1a'),
-        spaceAfter=30,
+        spaceAfter=30 + 0.2*inch,
         alignment=TA_CENTER,
         fontName='Helvetica-Bold'
-    )
+    ))
     
-    heading1_style = ParagraphStyle(
+    styles.add(ParagraphStyle(
+        'Author',
+        parent=styles['Normal'],
+        spaceAfter=0.3*inch
+    ))
+    
+    styles.add(ParagraphStyle(
         'CustomHeading1',
         parent=styles['Heading1'],
         fontSize=16,
@@ -43,9 +209,9 @@ def create_paper_pdf(output_path="paper.pdf"):
         spaceAfter=12,
         spaceBefore=12,
         fontName='Helvetica-Bold'
-    )
+    ))
     
-    heading2_style = ParagraphStyle(
+    styles.add(ParagraphStyle(
         'CustomHeading2',
         parent=styles['Heading2'],
         fontSize=14,
@@ -53,9 +219,9 @@ def create_paper_pdf(output_path="paper.pdf"):
         spaceAfter=10,
         spaceBefore=10,
         fontName='Helvetica-Bold'
-    )
+    ))
     
-    normal_style = ParagraphStyle(
+    styles.add(ParagraphStyle(
         'CustomNormal',
         parent=styles['Normal'],
         fontSize=11,
@@ -63,9 +229,9 @@ def create_paper_pdf(output_path="paper.pdf"):
         spaceAfter=12,
         alignment=TA_JUSTIFY,
         leading=14
-    )
+    ))
     
-    abstract_style = ParagraphStyle(
+    styles.add(ParagraphStyle(
         'Abstract',
         parent=styles['Normal'],
         fontSize=10,
@@ -75,82 +241,35 @@ def create_paper_pdf(output_path="paper.pdf"):
         leading=12,
         leftIndent=20,
         rightIndent=20
-    )
-    
-    # Title
-    elements.append(Paragraph("Predicting Sunset Times from Sky Images:<br/>A Deep Learning Approach Using Historical Webcam Data", title_style))
-    elements.append(Spacer(1, 0.2*inch))
-    elements.append(Paragraph("<i>Kasey Markel</i><br/>Department of Plant Biology, University of California, Berkeley", styles['Normal']))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Abstract
-    elements.append(Paragraph("<b>Abstract</b>", heading2_style))
-    abstract_text = """
-    We present a novel deep learning framework for predicting sunset times in Berkeley, California 
-    using sky images captured from the Lawrence Berkeley National Laboratory (LBNL) webcam. Our 
-    approach leverages convolutional neural networks to learn visual patterns in sky images that 
-    correlate with the time remaining until sunset, enabling predictions up to 3 hours in advance. 
-    We collected and curated a dataset of over 365 days of historical webcam imagery, paired with 
-    precise astronomical sunset times. Our ResNet-based regression model achieves a mean absolute 
-    error of 0.27 hours (16 minutes) on test data, demonstrating the feasibility of using computer 
-    vision for temporal astronomical predictions. This work has applications in solar energy 
-    forecasting, outdoor activity planning, and demonstrates how readily available webcam data can 
-    be repurposed for scientific prediction tasks.
-    """
-    elements.append(Paragraph(abstract_text, abstract_style))
-    elements.append(PageBreak())
-    
-    # Introduction
-    elements.append(Paragraph("1. Introduction", heading1_style))
-    elements.append(Paragraph("<b>1.1 Motivation</b>", heading2_style))
-    elements.append(Paragraph(
-        "Accurate prediction of sunset times has important applications in solar energy forecasting, "
-        "outdoor activity planning, and photography. While astronomical calculations provide precise "
-        "sunset times based on location and date, they do not account for local weather conditions, "
-        "atmospheric effects, or visibility that can affect the perceived timing of sunset. The "
-        "widespread availability of public webcam feeds presents an opportunity to leverage computer "
-        "vision for more context-aware sunset predictions.",
-        normal_style
     ))
     
-    elements.append(Paragraph("<b>1.2 Contributions</b>", heading2_style))
-    contributions = [
-        "First deep learning approach to predict sunset times from sky images",
-        "Novel dataset of 365+ days of Berkeley sky images with sunset annotations",
-        "Demonstration that visual sky patterns contain predictive information about sunset timing",
-        "Open-source pipeline for webcam-based astronomical prediction"
-    ]
-    for contrib in contributions:
-        elements.append(Paragraph(f"• {contrib}", normal_style))
-    
-    elements.append(PageBreak())
-    
-    # Methodology
-    elements.append(Paragraph("2. Methodology", heading1_style))
-    elements.append(Paragraph("<b>2.1 Problem Formulation</b>", heading2_style))
-    elements.append(Paragraph(
-        "Given a sky image I<sub>t</sub> captured at time t, we predict hours until sunset "
-        "h<sub>t</sub> = t<sub>sunset</sub> - t by learning a mapping f: I<sub>t</sub> → h<sub>t</sub> "
-        "that minimizes prediction error.",
-        normal_style
+    styles.add(ParagraphStyle(
+        'Caption',
+        parent=styles['Normal'],
+        fontSize=9,
+        alignment=TA_CENTER,
+        textColor=rl_colors.HexColor('#666666')
     ))
     
-    elements.append(Paragraph("<b>2.2 Dataset Collection</b>", heading2_style))
-    elements.append(Paragraph(
-        "We collected images from the LBNL webcam archive, capturing frames approximately 3 hours "
-        "before sunset across a full year (365 days) to ensure seasonal variation coverage.",
-        normal_style
+    styles.add(ParagraphStyle(
+        'FigureRef',
+        parent=styles['Normal'],
+        fontSize=10,
+        alignment=TA_CENTER,
+        textColor=rl_colors.HexColor('#0066cc')
     ))
     
-    # Dataset table
-    table_data = [
-        ['Split', 'Images', 'Mean Hours Before Sunset', 'Std Dev'],
-        ['Train', '292', '3.02 hours', '0.28 hours'],
-        ['Test', '73', '3.01 hours', '0.31 hours'],
-        ['Total', '365', '3.02 hours', '0.29 hours']
-    ]
-    table = Table(table_data, colWidths=[1.2*inch, 1*inch, 2*inch, 1*inch])
-    table.setStyle(TableStyle([
+    _STYLES = styles
+    return _STYLES
+
+
+@lru_cache(maxsize=1)
+def _dataset_table_style():
+    """Return the dataset table's TableStyle, built on first use (setStyle only reads it)."""
+    from reportlab.lib import colors as rl_colors
+    from reportlab.platypus import TableStyle
+    
+    return TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), rl_colors.grey),
         ('TEXTCOLOR', (0, 0), (-1, 0), rl_colors.whitesmoke),
         ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -160,158 +279,269 @@ def create_paper_pdf(output_path="paper.pdf"):
         ('BACKGROUND', (0, 1), (-1, -1), rl_colors.beige),
         ('GRID', (0, 0), (-1, -1), 1, rl_colors.black),
         ('FONTSIZE', (0, 1), (-1, -1), 9),
-    ]))
-    elements.append(Spacer(1, 0.1*inch))
-    elements.append(table)
-    elements.append(Spacer(1, 0.2*inch))
+    ])
+
+
+@lru_cache(maxsize=1)
+def _cached_paragraph_class():
+    """Return a Paragraph subclass that memoizes wrap() per available width."""
+    from reportlab.platypus import Paragraph
+    from reportlab.platypus.paragraph import _FUZZ
     
-    # Model Architecture Figure
-    elements.append(Paragraph("<b>2.3 Model Architecture</b>", heading2_style))
-    elements.append(Paragraph(
-        "We use a ResNet-18 backbone pretrained on ImageNet, replacing the classification head with "
-        "a regression head (512 → 256 → 128 → 1) to predict hours until sunset.",
-        normal_style
-    ))
+    class CachedParagraph(Paragraph):
+        """Paragraph that breaks its lines once per frame width.
+        
+        The cache dict is created with the paragraph and shared by its shallow
+        copies, so every build after the first skips breakLines entirely.
+        """
+        
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._wrap_cache = {}
+        
+        def wrap(self, availWidth, availHeight):
+            cached = self._wrap_cache.get(availWidth)
+            if cached is None:
+                size = super().wrap(availWidth, availHeight)
+                # Below _FUZZ Paragraph.wrap reports "doesn't fit" without
+                # breaking any lines, so there is nothing to cache
+                if availWidth >= _FUZZ:
+                    self._wrap_cache[availWidth] = (self._wrapWidths, self.blPara, self.height)
+                return size
+            else:
+                self.width = availWidth
+                self._wrapWidths, self.blPara, self.height = cached
+            return self.width, self.height
     
-    # Try PNG first, then PDF reference
-    fig_path = Path("figure_images/fig1_architecture.png")
-    if not fig_path.exists():
-        fig_path = Path("figures/fig1_architecture.pdf")
+    return CachedParagraph
+
+
+def _list_dir(path):
+    """Return the names of the files in path (empty if the directory is missing)."""
+    try:
+        with os.scandir(path) as entries:
+            return frozenset(entry.name for entry in entries)
+    except FileNotFoundError:
+        return frozenset()
+
+
+def _find_figure(fig_name, png_names, pdf_names):
+    """Return the PNG render of a figure if there is one, else its PDF, else None."""
+    if f"{fig_name}.png" in png_names:
+        return Path("figure_images") / f"{fig_name}.png"
+    if f"{fig_name}.pdf" in pdf_names:
+        return Path("figures") / f"{fig_name}.pdf"
+    return None
+
+
+def _pixel_box(width, height, dpi):
+    """Return the pixel size of a width x height (points) display box at dpi."""
+    return (round(width / inch * dpi), round(height / inch * dpi))
+
+
+def _encode_figure(fig_path, box):
+    """Return fig_path downsampled to fit box and re-encoded for embedding (cached).
+    
+    Plots and diagrams (few distinct colours) become 64-colour palette PNGs,
+    which keeps lines and text crisp; photo-like figures become JPEG, which
+    ReportLab embeds as-is. Caching the bytes means repeated builds skip the
+    decode entirely; a figure regenerated on disk is re-encoded.
+    """
+    key = (fig_path, box)
+    st = os.stat(fig_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _EMBED_CACHE.get(key)
+    data = cached[1] if cached is not None and cached[0] == stamp else None
+    if data is None:
+        from PIL import Image as PILImage
+        
+        with PILImage.open(fig_path) as pil:
+            pil = pil.convert('RGB')
+        # Counted before resampling, which would blend in new colours
+        is_plot = pil.getcolors(maxcolors=PALETTE_MAX_COLORS) is not None
+        pil.thumbnail(box, PILImage.Resampling.LANCZOS)
+        buf = io.BytesIO()
+        if is_plot:
+            pil.quantize(colors=64).save(buf, format='PNG', optimize=True)
+        else:
+            pil.save(buf, format='JPEG', quality=80, optimize=True)
+        data = buf.getvalue()
+        _EMBED_CACHE[key] = (stamp, data)
+    return data
+
+
+def _embedded_image(fig_path, width, height, dpi=EMBED_DPI):
+    """Return an Image flowable for fig_path, downsampled to its display box at dpi."""
+    from reportlab.platypus import Image
     
-    if fig_path.exists():
-        try:
+    data = _encode_figure(fig_path, _pixel_box(width, height, dpi))
+    return Image(io.BytesIO(data), width=width, height=height)
+
+
+class PaperBuilder:
+    """Builds the paper, creating the text flowables once and reusing them across builds.
+    
+    Only the figures are looked up and embedded per build, so callers producing
+    several PDFs (e.g. after regenerating figures) should keep one builder around.
+    """
+    
+    def __init__(self, dpi=EMBED_DPI):
+        self.dpi = dpi
+        self.styles = _get_styles()
+        # Static flowables, with the figure slots left as their method names
+        self._layout = [content if kind == "slot" else self._materialize(kind, content)
+                        for kind, content in _PAPER_SPEC]
+    
+    def _materialize(self, kind, content):
+        """Turn one text entry of _PAPER_SPEC into its flowable."""
+        from reportlab.platypus import CondPageBreak, Table
+        
+        if kind == "section_break":
+            return CondPageBreak(SECTION_MIN_HEIGHT)
+        if kind == "table":
+            table = Table(content, colWidths=_DATASET_COL_WIDTHS,
+                          spaceBefore=0.1*inch, spaceAfter=0.2*inch)
+            table.setStyle(_dataset_table_style())
+            return table
+        if kind == "bullets":
+            content = "<br/>".join(f"• {item}" for item in content)
+        elif kind == "references":
+            content = "<br/>".join(f"[{i}] {ref}" for i, ref in enumerate(content, 1))
+        return _cached_paragraph_class()(content, self.styles[_SPEC_STYLES[kind]])
+    
+    def _architecture_figure(self, png_names, pdf_names):
+        """Return the flowables for figure 1 (empty if it has not been rendered)."""
+        from reportlab.platypus import Paragraph
+        
+        dpi = self.dpi
+        styles = self.styles
+        caption_style = styles['Caption']
+        figref_style = styles['FigureRef']
+        elements = []
+        
+        # Try PNG first, then PDF reference
+        fig_path = _find_figure("fig1_architecture", png_names, pdf_names)
+        
+        if fig_path:
+            # Only the PNG path decodes anything; a PDF just gets a text reference
             if fig_path.suffix == '.png':
-                img = Image(str(fig_path), width=6*inch, height=3.5*inch)
+                try:
+                    img = _embedded_image(fig_path, *ARCH_FIGURE_SIZE, dpi=dpi)
+                except Exception:
+                    img = None
             else:
                 # For PDF, create a reference box
-                from reportlab.lib.units import cm
-                from reportlab.lib import colors
-                from reportlab.platypus import KeepTogether
                 img = None
-                elements.append(Paragraph("[Figure 1: Model Architecture - see figures/fig1_architecture.pdf]", 
-                                        ParagraphStyle('FigureRef', parent=styles['Normal'], 
-                                                     fontSize=10, alignment=TA_CENTER, 
-                                                         textColor=rl_colors.HexColor('#0066cc'))))
-        except:
-            img = None
+                elements.append(Paragraph("[Figure 1: Model Architecture - see figures/fig1_architecture.pdf]", figref_style))
+            
+            if img:
+                img.spaceBefore = 0.1*inch
+                elements.append(img)
+                elements.append(Paragraph("<i>Figure 1: Model architecture diagram</i>", caption_style))
         
-        if img:
-            elements.append(Spacer(1, 0.1*inch))
-            elements.append(img)
-            elements.append(Paragraph("<i>Figure 1: Model architecture diagram</i>", 
-                                    ParagraphStyle('Caption', parent=styles['Normal'], 
-                                                 fontSize=9, alignment=TA_CENTER, 
-                                                     textColor=rl_colors.HexColor('#666666'))))
+        return elements
     
-    elements.append(PageBreak())
-    
-    # Results
-    elements.append(Paragraph("3. Results", heading1_style))
-    elements.append(Paragraph("<b>3.1 Quantitative Results</b>", heading2_style))
-    elements.append(Paragraph(
-        "Our ResNet-18 model achieves a mean absolute error of 0.27 hours (16 minutes) on the test set, "
-        "demonstrating strong predictive performance.",
-        normal_style
-    ))
-    
-    # Add figures
-    figures = [
-        ("fig2_scatter.pdf", "Figure 2: Prediction accuracy scatter plot"),
-        ("fig3_residuals.pdf", "Figure 3: Residual analysis"),
-        ("fig4_histogram.pdf", "Figure 4: Error distribution histogram"),
-        ("fig5_examples.pdf", "Figure 5: Example predictions"),
-        ("fig7_temporal.pdf", "Figure 6: Temporal performance over time"),
-        ("fig8_comparison.pdf", "Figure 7: Model comparison"),
-        ("fig9_gradcam.pdf", "Figure 8: Grad-CAM visualizations"),
-    ]
-    
-    for fig_file, caption in figures:
-        # Try PNG first, then PDF
-        fig_name = fig_file.replace('.pdf', '')
-        fig_path = Path("figure_images") / f"{fig_name}.png"
-        if not fig_path.exists():
-            fig_path = Path("figures") / fig_file
+    def _results_figures(self, png_names, pdf_names):
+        """Return the flowables for the results figures that have been rendered."""
+        from reportlab.platypus import Paragraph
+        
+        dpi = self.dpi
+        styles = self.styles
+        normal_style = styles['CustomNormal']
+        caption_style = styles['Caption']
+        figref_style = styles['FigureRef']
+        elements = []
         
-        if fig_path.exists():
+        # Add figures
+        for fig_file, caption in RESULT_FIGURES:
+            # Try PNG first, then PDF
+            fig_path = _find_figure(fig_file.replace('.pdf', ''), png_names, pdf_names)
+            
+            if not fig_path:
+                continue
+            if fig_path.suffix != '.png':
+                # PDF reference
+                elements.append(Paragraph(f"[{caption} - see figures/{fig_file}]", figref_style))
+                continue
+            
             try:
-                if fig_path.suffix == '.png':
-                    img = Image(str(fig_path), width=6*inch, height=4.5*inch)
-                    elements.append(Spacer(1, 0.2*inch))
-                    elements.append(img)
-                    elements.append(Paragraph(f"<i>{caption}</i>", 
-                                            ParagraphStyle('Caption', parent=styles['Normal'], 
-                                                         fontSize=9, alignment=TA_CENTER, 
-                                                         textColor=rl_colors.HexColor('#666666'))))
-                else:
-                    # PDF reference
-                    elements.append(Paragraph(f"[{caption} - see figures/{fig_file}]", 
-                                            ParagraphStyle('FigureRef', parent=styles['Normal'], 
-                                                         fontSize=10, alignment=TA_CENTER, 
-                                                         textColor=rl_colors.HexColor('#0066cc'))))
-            except Exception as e:
+                img = _embedded_image(fig_path, *RESULT_FIGURE_SIZE, dpi=dpi)
+            except Exception:
                 # Placeholder
                 elements.append(Paragraph(f"[Figure: {caption}]", normal_style))
+                continue
+            img.spaceBefore = 0.2*inch
+            elements.append(img)
+            elements.append(Paragraph(f"<i>{caption}</i>", caption_style))
+        
+        return elements
     
-    elements.append(PageBreak())
-    
-    # Discussion
-    elements.append(Paragraph("4. Discussion", heading1_style))
-    elements.append(Paragraph("<b>4.1 What the Model Learns</b>", heading2_style))
-    elements.append(Paragraph(
-        "The model learns to associate visual features such as sky color gradients, cloud patterns, "
-        "and light intensity with the time remaining until sunset. Grad-CAM visualizations confirm "
-        "the model focuses on sky regions rather than ground features.",
-        normal_style
-    ))
-    
-    elements.append(Paragraph("<b>4.2 Limitations</b>", heading2_style))
-    limitations = [
-        "Geographic specificity: Model trained on Berkeley data may not generalize",
-        "Weather dependency: Performance varies with cloud cover",
-        "Temporal window: Best performance 1-3 hours before sunset",
-        "Data requirements: Needs substantial historical data (1 year+)"
-    ]
-    for lim in limitations:
-        elements.append(Paragraph(f"• {lim}", normal_style))
-    
-    elements.append(Paragraph("<b>4.3 Applications</b>", heading2_style))
-    applications = [
-        "Solar energy forecasting: Predict sunset for solar panel optimization",
-        "Outdoor activity planning: Better timing for photography, events",
-        "Atmospheric science: Understanding sky pattern evolution",
-        "Webcam data repurposing: Demonstrates value of public webcam archives"
-    ]
-    for app in applications:
-        elements.append(Paragraph(f"• {app}", normal_style))
-    
-    elements.append(PageBreak())
-    
-    # Conclusion
-    elements.append(Paragraph("5. Conclusion", heading1_style))
-    elements.append(Paragraph(
-        "We presented the first deep learning approach to predict sunset times from sky images, "
-        "achieving 16-minute mean absolute error using a ResNet-based regression model. Our work "
-        "demonstrates that visual sky patterns contain predictive information about sunset timing, "
-        "enabling practical applications in solar energy and outdoor planning. The use of publicly "
-        "available webcam data highlights the potential for repurposing existing infrastructure for "
-        "scientific prediction tasks.",
-        normal_style
-    ))
+    def _prefetch_figures(self, png_names, pdf_names):
+        """Encode every PNG figure in a thread pool before layout.
+        
+        Pillow releases the GIL while decoding, resampling and encoding, so the
+        figures are processed in parallel; the layout code then finds them in the
+        cache. Failures are left for the layout code to turn into placeholders.
+        """
+        sized_paths = [(_find_figure("fig1_architecture", png_names, pdf_names), ARCH_FIGURE_SIZE)]
+        sized_paths += [(_find_figure(fig_file.replace('.pdf', ''), png_names, pdf_names),
+                         RESULT_FIGURE_SIZE) for fig_file, _ in RESULT_FIGURES]
+        jobs = [(fig_path, _pixel_box(*size, self.dpi)) for fig_path, size in sized_paths
+                if fig_path and fig_path.suffix == '.png']
+        
+        def encode(job):
+            try:
+                _encode_figure(*job)
+            except Exception:
+                pass
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(encode, jobs))
     
-    # References
-    elements.append(Spacer(1, 0.3*inch))
-    elements.append(Paragraph("References", heading1_style))
-    refs = [
-        "Meeus, J. (1998). Astronomical Algorithms. Willmann-Bell.",
-        "Yang, D., et al. (2020). Solar forecasting from sky images using convolutional neural networks. IEEE Transactions on Sustainable Energy.",
-        "He, K., et al. (2016). Deep residual learning for image recognition. CVPR."
-    ]
-    for i, ref in enumerate(refs, 1):
-        elements.append(Paragraph(f"[{i}] {ref}", normal_style))
+    def build(self, output_path):
+        """Lay the paper out and write it to output_path (a path or a writable binary stream)."""
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate
+        
+        # Content streams are zlib-compressed regardless of the global rl_config default
+        doc = SimpleDocTemplate(output_path, pagesize=letter,
+                               rightMargin=72, leftMargin=72,
+                               topMargin=72, bottomMargin=18,
+                               pageCompression=1)
+        
+        # One directory read each instead of two stat() calls per figure
+        png_names = _list_dir("figure_images")
+        pdf_names = _list_dir("figures")
+        self._prefetch_figures(png_names, pdf_names)
+        
+        # doc.build consumes its list and tags flowables it had to postpone, so it
+        # gets shallow copies and the originals stay untouched for the next build.
+        # The copies share the parsed frags, so nothing is re-parsed; line breaking
+        # only memoizes a per-frag kind flag on them, which is the same every build
+        elements = []
+        for item in self._layout:
+            if isinstance(item, str):
+                elements += getattr(self, f"_{item}")(png_names, pdf_names)
+            else:
+                elements.append(copy.copy(item))
+        
+        # Build PDF
+        doc.build(elements)
+        print(f"✓ Paper PDF created: {getattr(output_path, 'name', output_path)}")
+
+
+@lru_cache(maxsize=None)
+def _default_builder(dpi):
+    """One PaperBuilder per dpi, so repeated create_paper_pdf calls parse the text only once."""
+    return PaperBuilder(dpi)
+
+
+def create_paper_pdf(output_path="paper.pdf", dpi=EMBED_DPI):
+    """Create the complete paper as PDF, embedding figures at dpi.
     
-    # Build PDF
-    doc.build(elements)
-    print(f"✓ Paper PDF created: {output_path}")
+    output_path may also be a writable binary stream (e.g. an open file or BytesIO).
+    """
+    _default_builder(dpi).build(output_path)
 
 
 if __name__ == "__main__":
@@ -8,20 +8,143 @@ matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 import json
+import os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from scipy.stats import pearsonr
-import seaborn as sns
+from scipy.stats import t as t_dist
+from io_utils import is_stale
 
-# Set style
-sns.set_style("whitegrid")
+# orjson is optional; it parses the comparison file several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Set style: seaborn's "whitegrid" theme as plain rcParams, so the script
+# doesn't import seaborn just to set a style
+plt.rcParams.update({
+    'axes.grid': True,
+    'axes.axisbelow': True,
+    'axes.edgecolor': '.8',
+    'axes.labelcolor': '.15',
+    'grid.color': '.8',
+    'text.color': '.15',
+    'xtick.color': '.15',
+    'ytick.color': '.15',
+    'xtick.bottom': False,
+    'ytick.left': False,
+    'patch.edgecolor': 'w',
+    'patch.force_edgecolor': True,
+    'lines.solid_capstyle': 'round',
+    'font.sans-serif': ['Arial', 'DejaVu Sans', 'Liberation Sans', 'Bitstream Vera Sans', 'sans-serif'],
+})
 plt.rcParams['figure.dpi'] = 300
-plt.rcParams['savefig.dpi'] = 300
 plt.rcParams['font.size'] = 10
+plt.rcParams.update({'axes.labelweight': 'bold', 'axes.titleweight': 'bold'})
+
+COMPARISON_FILE = Path("data/training/model_comparison.json")
+WEATHER_FILE = Path("data/weather/weather_data.csv")
+
+# Single-colour scatters are drawn as plot() markers, which skip scatter's
+# per-point colour/size mapping; markersize is in points, s=50 in points^2
+POINT_STYLE = dict(linestyle='none', marker='o', markersize=np.sqrt(50),
+                   markeredgecolor='black', markeredgewidth=0.5, alpha=0.6)
+
+@lru_cache(maxsize=1)
+def _parse_comparison(path, mtime_ns):
+    """Parse the model comparison JSON (cached per path/mtime)."""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r") as f:
+        return json.load(f)
+
+def _load_comparison(path=COMPARISON_FILE):
+    """Return the parsed model comparison shared by figures 13-17, or None if missing."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return _parse_comparison(path, path.stat().st_mtime_ns)
+
+@lru_cache(maxsize=1)
+def _align_predictions(path, mtime_ns):
+    """Join image-only and weather-only predictions on date (cached per path/mtime)."""
+    comparison = _parse_comparison(path, mtime_ns)
+    img_results = comparison.get("image_only", [])
+    weather_results = comparison.get("weather_only", {}).get("predictions", [])
+    if not img_results or not weather_results:
+        return None
+    
+    # Hash-join on date (last record wins for repeated dates, as with a dict)
+    cols = ["date", "true_quality", "pred_quality"]
+    merged = (pd.DataFrame(img_results, columns=cols).drop_duplicates("date", keep="last")
+              .merge(pd.DataFrame(weather_results, columns=cols).drop_duplicates("date", keep="last"),
+                     on="date", suffixes=("_img", "_w"))
+              .sort_values("date"))
+    
+    return (merged["date"].to_numpy(dtype=str),
+            merged["true_quality_img"].to_numpy(dtype=float),
+            merged["pred_quality_img"].to_numpy(dtype=float),
+            merged["true_quality_w"].to_numpy(dtype=float),
+            merged["pred_quality_w"].to_numpy(dtype=float))
+
+def _aligned_predictions(path=COMPARISON_FILE):
+    """Return (dates, true_q, img_q, weather_true_q, weather_q) over the dates both
+    models predicted, or None if the comparison or either model's results are missing."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return _align_predictions(path, path.stat().st_mtime_ns)
+
+def _pear(x, y):
+    """Pearson r as the dot product of the mean-centred, unit-normalised inputs."""
+    xc = x - x.mean()
+    yc = y - y.mean()
+    return float(xc @ yc / (np.linalg.norm(xc) * np.linalg.norm(yc)))
+
+def _pearson_with_p(x, y):
+    """Pearson r and two-sided p-value from the t statistic (skips pearsonr's validation)."""
+    n = len(x)
+    r = float(np.clip(_pear(x, y), -1.0, 1.0))
+    if abs(r) == 1.0:
+        return r, 0.0
+    t_stat = abs(r) * np.sqrt((n - 2) / (1 - r * r))
+    return r, float(2 * t_dist.sf(t_stat, n - 2))
+
+_shared_figure = None
+
+def reusable_subplots(nrows=1, ncols=1, figsize=None):
+    """Return (fig, axes) on one shared, cleared Figure instead of a new one per plot."""
+    global _shared_figure
+    if _shared_figure is None:
+        _shared_figure = plt.figure(figsize=figsize)
+    else:
+        _shared_figure.clf()
+        _shared_figure.set_size_inches(figsize)
+    return _shared_figure, _shared_figure.subplots(nrows, ncols)
+
+def _style(ax, xlabel, ylabel, title, xlim=None, ylim=None, grid_axis='both',
+           legend=None, label_size=12):
+    """Apply the shared label/title/limit/grid/legend styling to one axes."""
+    if xlabel is not None:
+        ax.set_xlabel(xlabel, fontsize=label_size)
+    if ylabel is not None:
+        ax.set_ylabel(ylabel, fontsize=label_size)
+    ax.set_title(title, fontsize=12)
+    if xlim is not None:
+        ax.set_xlim(*xlim)
+    if ylim is not None:
+        ax.set_ylim(*ylim)
+    ax.grid(True, alpha=0.3, axis=grid_axis)
+    if legend is not None:
+        ax.legend(**(legend if isinstance(legend, dict) else {}))
+    return ax
 
 def create_figure_12_weather_architecture():
     """Figure 12: Weather-only model architecture."""
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = reusable_subplots(figsize=(10, 6))
     ax.axis('off')
     
     boxes = [
@@ -55,21 +178,17 @@ def create_figure_12_weather_architecture():
     ax.set_ylim(0, 1)
     ax.set_title("Weather-Only Predictor Architecture", fontsize=16, fontweight='bold', pad=20)
     
-    plt.tight_layout()
-    plt.savefig("figures/fig12_weather_architecture.pdf", bbox_inches='tight')
-    plt.close()
+    fig.tight_layout()
+    fig.savefig("figures/fig12_weather_architecture.pdf")
     print("✓ Figure 12: Weather architecture")
 
 def create_figure_13_weather_scatter():
     """Figure 13: Weather-only prediction scatter plots."""
-    comparison_file = Path("data/training/model_comparison.json")
-    if not comparison_file.exists():
+    comparison = _load_comparison()
+    if comparison is None:
         print("⚠ No model comparison found")
         return
     
-    with open(comparison_file, "r") as f:
-        comparison = json.load(f)
-    
     weather_results = comparison.get("weather_only")
     if not weather_results or not weather_results.get("predictions"):
         print("⚠ Weather-only results not found")
@@ -84,79 +203,63 @@ def create_figure_13_weather_scatter():
     true_duration = np.array([p["true_duration_above_5"] for p in predictions])
     pred_duration = np.array([p["pred_duration_above_5"] for p in predictions])
     
-    fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 5))
+    fig, (ax1, ax2, ax3) = reusable_subplots(1, 3, figsize=(18, 5))
     
     # Quality scatter
-    ax1.scatter(true_quality, pred_quality, alpha=0.6, s=50, c='steelblue', edgecolors='black', linewidth=0.5)
+    ax1.plot(true_quality, pred_quality, markerfacecolor='steelblue', **POINT_STYLE)
     ax1.plot([0, 10], [0, 10], 'r--', linewidth=2, label='Perfect prediction')
-    corr_q, p_val_q = pearsonr(true_quality, pred_quality)
+    corr_q, p_val_q = _pearson_with_p(true_quality, pred_quality)
     mean_pred = np.mean(pred_quality)
     ax1.axhline(y=mean_pred, color='orange', linestyle=':', linewidth=2, 
                label=f'Baseline (mean={mean_pred:.2f})')
     ax1.text(0.05, 0.95, f'r = {corr_q:.3f}\np = {p_val_q:.3f}', 
             transform=ax1.transAxes, fontsize=10,
             verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-    ax1.set_xlabel('True Quality Score', fontsize=11, fontweight='bold')
-    ax1.set_ylabel('Predicted Quality Score', fontsize=11, fontweight='bold')
-    ax1.set_title('Quality Prediction (Weather)', fontsize=12, fontweight='bold')
-    ax1.grid(True, alpha=0.3)
-    ax1.legend(loc='lower right', fontsize=8)
-    ax1.set_xlim(0, 10)
-    ax1.set_ylim(0, 10)
+    _style(ax1, 'True Quality Score', 'Predicted Quality Score', 'Quality Prediction (Weather)',
+           xlim=(0, 10), ylim=(0, 10), legend=dict(loc='lower right', fontsize=8), label_size=11)
     
     # Peak time scatter
-    peak_range = max(abs(min(true_peak)), abs(max(true_peak)), abs(min(pred_peak)), abs(max(pred_peak))) + 5
-    ax2.scatter(true_peak, pred_peak, alpha=0.6, s=50, c='coral', edgecolors='black', linewidth=0.5)
+    peak_range = float(np.maximum(np.abs(true_peak).max(), np.abs(pred_peak).max())) + 5
+    ax2.plot(true_peak, pred_peak, markerfacecolor='coral', **POINT_STYLE)
     ax2.plot([-peak_range, peak_range], [-peak_range, peak_range], 'r--', linewidth=2, label='Perfect prediction')
-    corr_p, p_val_p = pearsonr(true_peak, pred_peak)
+    corr_p, p_val_p = _pearson_with_p(true_peak, pred_peak)
     mean_pred_p = np.mean(pred_peak)
     ax2.axhline(y=mean_pred_p, color='orange', linestyle=':', linewidth=2,
                label=f'Baseline (mean={mean_pred_p:.2f})')
     ax2.text(0.05, 0.95, f'r = {corr_p:.3f}\np = {p_val_p:.3f}',
             transform=ax2.transAxes, fontsize=10,
             verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-    ax2.set_xlabel('True Peak Time (minutes)', fontsize=11, fontweight='bold')
-    ax2.set_ylabel('Predicted Peak Time (minutes)', fontsize=11, fontweight='bold')
-    ax2.set_title('Peak Time Prediction (Weather)', fontsize=12, fontweight='bold')
-    ax2.grid(True, alpha=0.3)
-    ax2.legend(loc='lower right', fontsize=8)
-    ax2.set_xlim(-peak_range, peak_range)
-    ax2.set_ylim(-peak_range, peak_range)
+    _style(ax2, 'True Peak Time (minutes)', 'Predicted Peak Time (minutes)',
+           'Peak Time Prediction (Weather)', xlim=(-peak_range, peak_range),
+           ylim=(-peak_range, peak_range), legend=dict(loc='lower right', fontsize=8),
+           label_size=11)
     
     # Duration scatter
-    max_duration = max(max(true_duration), max(pred_duration)) + 5
-    ax3.scatter(true_duration, pred_duration, alpha=0.6, s=50, c='mediumseagreen', edgecolors='black', linewidth=0.5)
+    max_duration = float(np.maximum(true_duration.max(), pred_duration.max())) + 5
+    ax3.plot(true_duration, pred_duration, markerfacecolor='mediumseagreen', **POINT_STYLE)
     ax3.plot([0, max_duration], [0, max_duration], 'r--', linewidth=2, label='Perfect prediction')
-    corr_d, p_val_d = pearsonr(true_duration, pred_duration)
+    corr_d, p_val_d = _pearson_with_p(true_duration, pred_duration)
     mean_pred_d = np.mean(pred_duration)
     ax3.axhline(y=mean_pred_d, color='orange', linestyle=':', linewidth=2,
                label=f'Baseline (mean={mean_pred_d:.2f})')
     ax3.text(0.05, 0.95, f'r = {corr_d:.3f}\np = {p_val_d:.3f}',
             transform=ax3.transAxes, fontsize=10,
             verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-    ax3.set_xlabel('True Duration Above 5 (minutes)', fontsize=11, fontweight='bold')
-    ax3.set_ylabel('Predicted Duration Above 5 (minutes)', fontsize=11, fontweight='bold')
-    ax3.set_title('Duration Above Quality 5 Prediction (Weather)', fontsize=12, fontweight='bold')
-    ax3.grid(True, alpha=0.3)
-    ax3.legend(loc='lower right', fontsize=8)
-    ax3.set_xlim(0, max_duration)
-    ax3.set_ylim(0, max_duration)
-    
-    plt.tight_layout()
-    plt.savefig("figures/fig13_weather_scatter.pdf", bbox_inches='tight')
-    plt.close()
+    _style(ax3, 'True Duration Above 5 (minutes)', 'Predicted Duration Above 5 (minutes)',
+           'Duration Above Quality 5 Prediction (Weather)', xlim=(0, max_duration),
+           ylim=(0, max_duration), legend=dict(loc='lower right', fontsize=8), label_size=11)
+    
+    fig.tight_layout()
+    fig.savefig("figures/fig13_weather_scatter.pdf")
     print(f"✓ Figure 13: Weather scatter plots (Quality r={corr_q:.3f}, Peak r={corr_p:.3f}, Duration r={corr_d:.3f})")
 
 def create_figure_14_model_comparison():
     """Figure 14: Compare image-only vs weather-only performance."""
-    comparison_file = Path("data/training/model_comparison.json")
-    if not comparison_file.exists():
+    comparison = _load_comparison()
+    if comparison is None:
         print("⚠ No model comparison found")
         return
     
-    with open(comparison_file, "r") as f:
-        comparison = json.load(f)
-    
     img_results = comparison.get("image_only")
     weather_results = comparison.get("weather_only")
     
@@ -164,117 +267,63 @@ def create_figure_14_model_comparison():
         print("⚠ Missing model results")
         return
     
+    # One pass over the records; missing durations count as 0 as before
+    img_df = pd.DataFrame(img_results).reindex(columns=[
+        "true_quality", "pred_quality", "true_peak_time", "pred_peak_time",
+        "true_duration_above_5", "pred_duration_above_5"]).fillna(0)
+    true_q, pred_q = img_df["true_quality"].to_numpy(), img_df["pred_quality"].to_numpy()
+    true_p, pred_p = img_df["true_peak_time"].to_numpy(), img_df["pred_peak_time"].to_numpy()
+    true_d = img_df["true_duration_above_5"].to_numpy()
+    pred_d = img_df["pred_duration_above_5"].to_numpy()
+    
     # Extract metrics
     models = ['Image-Only', 'Weather-Only']
-    quality_mae = [
-        np.mean([abs(p["pred_quality"] - p["true_quality"]) for p in img_results]),
-        weather_results["quality"]["mae"]
-    ]
-    quality_corr = [
-        pearsonr([p["true_quality"] for p in img_results], 
-                 [p["pred_quality"] for p in img_results])[0],
-        weather_results["quality"]["correlation"]
-    ]
+    quality_mae = [np.abs(pred_q - true_q).mean(), weather_results["quality"]["mae"]]
+    quality_corr = [_pear(true_q, pred_q), weather_results["quality"]["correlation"]]
     
-    peak_mae = [
-        np.mean([abs(p["pred_peak_time"] - p["true_peak_time"]) for p in img_results]),
-        weather_results["peak_time"]["mae"]
-    ]
-    peak_corr = [
-        pearsonr([p["true_peak_time"] for p in img_results],
-                 [p["pred_peak_time"] for p in img_results])[0],
-        weather_results["peak_time"]["correlation"]
-    ]
+    peak_mae = [np.abs(pred_p - true_p).mean(), weather_results["peak_time"]["mae"]]
+    peak_corr = [_pear(true_p, pred_p), weather_results["peak_time"]["correlation"]]
     
-    duration_mae = [
-        np.mean([abs(p.get("pred_duration_above_5", 0) - p.get("true_duration_above_5", 0)) 
-                for p in img_results]),
-        weather_results["duration"]["mae"]
-    ]
-    duration_corr = [
-        pearsonr([p.get("true_duration_above_5", 0) for p in img_results],
-                 [p.get("pred_duration_above_5", 0) for p in img_results])[0],
-        weather_results["duration"]["correlation"]
-    ]
+    duration_mae = [np.abs(pred_d - true_d).mean(), weather_results["duration"]["mae"]]
+    duration_corr = [_pear(true_d, pred_d), weather_results["duration"]["correlation"]]
     
-    fig, axes = plt.subplots(2, 3, figsize=(18, 10))
+    fig, axes = reusable_subplots(2, 3, figsize=(18, 10))
     
-    x = np.arange(len(models))
-    width = 0.35
+    # MAE comparison (one bar per model, coloured like the figure 13 panels)
+    axes[0, 0].bar(models, quality_mae, color=['steelblue', 'lightgreen'], alpha=0.7)
+    _style(axes[0, 0], None, 'MAE', 'Quality Prediction MAE', grid_axis='y')
+    
+    axes[0, 1].bar(models, peak_mae, color=['coral', 'lightgreen'], alpha=0.7)
+    _style(axes[0, 1], None, 'MAE (minutes)', 'Peak Time Prediction MAE', grid_axis='y')
     
-    # MAE comparison
-    axes[0, 0].bar(x - width/2, quality_mae, width, label='Image-Only', color='steelblue', alpha=0.7)
-    axes[0, 0].bar(x + width/2, [weather_results["quality"]["mae"], 0], width, label='Weather-Only', color='lightgreen', alpha=0.7)
-    axes[0, 0].set_ylabel('MAE', fontsize=12, fontweight='bold')
-    axes[0, 0].set_title('Quality Prediction MAE', fontsize=12, fontweight='bold')
-    axes[0, 0].set_xticks(x)
-    axes[0, 0].set_xticklabels(models)
-    axes[0, 0].legend()
-    axes[0, 0].grid(True, alpha=0.3, axis='y')
-    
-    axes[0, 1].bar(x - width/2, peak_mae, width, label='Image-Only', color='coral', alpha=0.7)
-    axes[0, 1].bar(x + width/2, [weather_results["peak_time"]["mae"], 0], width, label='Weather-Only', color='lightgreen', alpha=0.7)
-    axes[0, 1].set_ylabel('MAE (minutes)', fontsize=12, fontweight='bold')
-    axes[0, 1].set_title('Peak Time Prediction MAE', fontsize=12, fontweight='bold')
-    axes[0, 1].set_xticks(x)
-    axes[0, 1].set_xticklabels(models)
-    axes[0, 1].legend()
-    axes[0, 1].grid(True, alpha=0.3, axis='y')
-    
-    axes[0, 2].bar(x - width/2, duration_mae, width, label='Image-Only', color='mediumseagreen', alpha=0.7)
-    axes[0, 2].bar(x + width/2, [weather_results["duration"]["mae"], 0], width, label='Weather-Only', color='lightgreen', alpha=0.7)
-    axes[0, 2].set_ylabel('MAE (minutes)', fontsize=12, fontweight='bold')
-    axes[0, 2].set_title('Duration Above 5 Prediction MAE', fontsize=12, fontweight='bold')
-    axes[0, 2].set_xticks(x)
-    axes[0, 2].set_xticklabels(models)
-    axes[0, 2].legend()
-    axes[0, 2].grid(True, alpha=0.3, axis='y')
+    axes[0, 2].bar(models, duration_mae, color=['mediumseagreen', 'lightgreen'], alpha=0.7)
+    _style(axes[0, 2], None, 'MAE (minutes)', 'Duration Above 5 Prediction MAE', grid_axis='y')
     
     # Correlation comparison
-    axes[1, 0].bar(x - width/2, quality_corr, width, label='Image-Only', color='steelblue', alpha=0.7)
-    axes[1, 0].bar(x + width/2, [weather_results["quality"]["correlation"], 0], width, label='Weather-Only', color='lightgreen', alpha=0.7)
+    axes[1, 0].bar(models, quality_corr, color=['steelblue', 'lightgreen'], alpha=0.7)
     axes[1, 0].axhline(y=0, color='black', linestyle='-', linewidth=0.5)
-    axes[1, 0].set_ylabel('Correlation (r)', fontsize=12, fontweight='bold')
-    axes[1, 0].set_title('Quality Prediction Correlation', fontsize=12, fontweight='bold')
-    axes[1, 0].set_xticks(x)
-    axes[1, 0].set_xticklabels(models)
-    axes[1, 0].legend()
-    axes[1, 0].grid(True, alpha=0.3, axis='y')
-    
-    axes[1, 1].bar(x - width/2, peak_corr, width, label='Image-Only', color='coral', alpha=0.7)
-    axes[1, 1].bar(x + width/2, [weather_results["peak_time"]["correlation"], 0], width, label='Weather-Only', color='lightgreen', alpha=0.7)
+    _style(axes[1, 0], None, 'Correlation (r)', 'Quality Prediction Correlation', grid_axis='y')
+    
+    axes[1, 1].bar(models, peak_corr, color=['coral', 'lightgreen'], alpha=0.7)
     axes[1, 1].axhline(y=0, color='black', linestyle='-', linewidth=0.5)
-    axes[1, 1].set_ylabel('Correlation (r)', fontsize=12, fontweight='bold')
-    axes[1, 1].set_title('Peak Time Prediction Correlation', fontsize=12, fontweight='bold')
-    axes[1, 1].set_xticks(x)
-    axes[1, 1].set_xticklabels(models)
-    axes[1, 1].legend()
-    axes[1, 1].grid(True, alpha=0.3, axis='y')
-    
-    axes[1, 2].bar(x - width/2, duration_corr, width, label='Image-Only', color='mediumseagreen', alpha=0.7)
-    axes[1, 2].bar(x + width/2, [weather_results["duration"]["correlation"], 0], width, label='Weather-Only', color='lightgreen', alpha=0.7)
+    _style(axes[1, 1], None, 'Correlation (r)', 'Peak Time Prediction Correlation', grid_axis='y')
+    
+    axes[1, 2].bar(models, duration_corr, color=['mediumseagreen', 'lightgreen'], alpha=0.7)
     axes[1, 2].axhline(y=0, color='black', linestyle='-', linewidth=0.5)
-    axes[1, 2].set_ylabel('Correlation (r)', fontsize=12, fontweight='bold')
-    axes[1, 2].set_title('Duration Above 5 Prediction Correlation', fontsize=12, fontweight='bold')
-    axes[1, 2].set_xticks(x)
-    axes[1, 2].set_xticklabels(models)
-    axes[1, 2].legend()
-    axes[1, 2].grid(True, alpha=0.3, axis='y')
-    
-    plt.tight_layout()
-    plt.savefig("figures/fig14_model_comparison.pdf", bbox_inches='tight')
-    plt.close()
+    _style(axes[1, 2], None, 'Correlation (r)', 'Duration Above 5 Prediction Correlation',
+           grid_axis='y')
+    
+    fig.tight_layout()
+    fig.savefig("figures/fig14_model_comparison.pdf")
     print("✓ Figure 14: Model comparison (Image vs Weather)")
 
 def create_figure_15_weather_features():
     """Figure 15: Weather feature importance/analysis."""
-    # Load weather data
-    weather_df = pd.read_csv("data/weather/weather_data.csv")
-    
     # Load predictions to see which features correlate with quality
-    comparison_file = Path("data/training/model_comparison.json")
-    with open(comparison_file, "r") as f:
-        comparison = json.load(f)
+    comparison = _load_comparison()
+    if comparison is None:
+        print("⚠ No model comparison found")
+        return
     
     weather_results = comparison.get("weather_only", {}).get("predictions", [])
     
@@ -282,27 +331,42 @@ def create_figure_15_weather_features():
         print("⚠ No weather predictions found")
         return
     
-    # Match dates and calculate correlations (only for dates with predictions)
-    date_to_quality = {p["date"]: p["true_quality"] for p in weather_results}
-    weather_df['quality'] = weather_df['date'].map(date_to_quality)
-    
-    # Filter to only dates with quality scores
-    weather_with_quality = weather_df.dropna(subset=['quality'])
-    
+    # Load weather data, parsing only the date and the features we plot
+    # (a callable usecols tolerates features missing from older CSVs)
     feature_cols = ['temperature_mean', 'humidity', 'cloud_cover', 'precipitation', 
                     'wind_speed', 'pressure']
-    correlations = {}
+    wanted_cols = {'date', *feature_cols}
+    weather_df = pd.read_csv(WEATHER_FILE, usecols=lambda col: col in wanted_cols,
+                             dtype={'date': str})
     
-    for col in feature_cols:
-        if col in weather_with_quality.columns:
-            feature_vals = weather_with_quality[col].dropna()
-            quality_vals = weather_with_quality.loc[feature_vals.index, 'quality']
-            if len(feature_vals) > 2:
-                corr, p_val = pearsonr(feature_vals, quality_vals)
-                correlations[col] = {'r': corr, 'p': p_val}
+    # Match dates and calculate correlations (only for dates with predictions):
+    # an inner join against the small prediction table, rather than mapping
+    # every CSV row and then dropping the unmatched ones
+    date_to_quality = {p["date"]: p["true_quality"] for p in weather_results}
+    quality_df = pd.DataFrame({'date': list(date_to_quality),
+                               'quality': list(date_to_quality.values())}).dropna()
+    weather_with_quality = weather_df.merge(quality_df, on='date', how='inner')
+    
+    # Correlate every feature with quality in one pass, each over the rows
+    # where that feature is present (same pairs as a per-column dropna)
+    present_cols = [col for col in feature_cols if col in weather_with_quality.columns]
+    F = weather_with_quality[present_cols].to_numpy(dtype=np.float64)
+    q = weather_with_quality['quality'].to_numpy(dtype=np.float64)
+    mask = ~np.isnan(F)
+    n = mask.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Fc = np.where(mask, F - np.where(mask, F, 0.0).sum(axis=0) / n, 0.0)
+        qc = np.where(mask, q[:, None] - (mask * q[:, None]).sum(axis=0) / n, 0.0)
+        r = np.clip((Fc * qc).sum(axis=0)
+                    / np.sqrt((Fc * Fc).sum(axis=0) * (qc * qc).sum(axis=0)), -1.0, 1.0)
+        t_stat = np.abs(r) * np.sqrt((n - 2) / (1 - r * r))
+    p_vals = 2 * t_dist.sf(t_stat, np.maximum(n - 2, 1))
+    
+    correlations = {col: {'r': float(r[i]), 'p': float(p_vals[i])}
+                    for i, col in enumerate(present_cols) if n[i] > 2}
     
     # Create figure
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+    fig, (ax1, ax2) = reusable_subplots(1, 2, figsize=(14, 5))
     
     # Correlation bar plot
     features = list(correlations.keys())
@@ -312,9 +376,8 @@ def create_figure_15_weather_features():
     colors = ['green' if p < 0.05 else 'gray' for p in p_values]
     ax1.barh(features, corr_values, color=colors, alpha=0.7)
     ax1.axvline(x=0, color='black', linestyle='-', linewidth=0.5)
-    ax1.set_xlabel('Correlation with Sunset Quality', fontsize=12, fontweight='bold')
-    ax1.set_title('Weather Feature Correlations', fontsize=12, fontweight='bold')
-    ax1.grid(True, alpha=0.3, axis='x')
+    _style(ax1, 'Correlation with Sunset Quality', None, 'Weather Feature Correlations',
+           grid_axis='x')
     
     # Add p-value annotations
     for i, (feat, corr, p) in enumerate(zip(features, corr_values, p_values)):
@@ -326,46 +389,27 @@ def create_figure_15_weather_features():
     available_cols = [col for col in feature_cols[:3] if col in weather_df.columns]
     if available_cols:
         weather_df[available_cols].boxplot(ax=ax2)
-    ax2.set_ylabel('Normalized Values', fontsize=12, fontweight='bold')
-    ax2.set_title('Weather Feature Distributions', fontsize=12, fontweight='bold')
     ax2.tick_params(axis='x', rotation=45)
-    ax2.grid(True, alpha=0.3, axis='y')
+    _style(ax2, None, 'Normalized Values', 'Weather Feature Distributions', grid_axis='y')
     
-    plt.tight_layout()
-    plt.savefig("figures/fig15_weather_features.pdf", bbox_inches='tight')
-    plt.close()
+    fig.tight_layout()
+    fig.savefig("figures/fig15_weather_features.pdf")
     print("✓ Figure 15: Weather feature analysis")
 
 def create_figure_16_combined_comparison():
     """Figure 16: Side-by-side comparison of all predictions."""
     # This will show image-only vs weather-only predictions for same samples
-    comparison_file = Path("data/training/model_comparison.json")
-    with open(comparison_file, "r") as f:
-        comparison = json.load(f)
-    
-    img_results = comparison.get("image_only", [])
-    weather_results = comparison.get("weather_only", {}).get("predictions", [])
-    
-    if not img_results or not weather_results:
+    aligned = _aligned_predictions()
+    if aligned is None:
         print("⚠ Missing results for comparison")
         return
-    
-    # Match by date
-    img_dict = {r["date"]: r for r in img_results}
-    weather_dict = {r["date"]: r for r in weather_results}
-    
-    common_dates = sorted(set(img_dict.keys()) & set(weather_dict.keys()))
+    common_dates, true_quality, img_pred_q, _, weather_pred_q = aligned
     
     if len(common_dates) == 0:
         print("⚠ No common dates between models")
         return
     
-    # Extract data
-    true_quality = [img_dict[d]["true_quality"] for d in common_dates]
-    img_pred_q = [img_dict[d]["pred_quality"] for d in common_dates]
-    weather_pred_q = [weather_dict[d]["pred_quality"] for d in common_dates]
-    
-    fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+    fig, axes = reusable_subplots(1, 3, figsize=(18, 5))
     
     # Quality comparison
     x = np.arange(len(common_dates))
@@ -374,69 +418,47 @@ def create_figure_16_combined_comparison():
     axes[0].bar(x - width/2, true_quality, width, label='True', color='black', alpha=0.5)
     axes[0].bar(x, img_pred_q, width, label='Image-Only', color='steelblue', alpha=0.7)
     axes[0].bar(x + width/2, weather_pred_q, width, label='Weather-Only', color='lightgreen', alpha=0.7)
-    axes[0].set_ylabel('Quality Score', fontsize=12, fontweight='bold')
-    axes[0].set_title('Quality Predictions Comparison', fontsize=12, fontweight='bold')
     axes[0].set_xticks(x[::5])
-    axes[0].set_xticklabels([common_dates[i] for i in range(0, len(common_dates), 5)], rotation=45)
-    axes[0].legend()
-    axes[0].grid(True, alpha=0.3, axis='y')
+    axes[0].set_xticklabels(common_dates[::5], rotation=45)
+    _style(axes[0], None, 'Quality Score', 'Quality Predictions Comparison', grid_axis='y',
+           legend=True)
     
     # Error comparison
-    img_errors = [abs(img_pred_q[i] - true_quality[i]) for i in range(len(true_quality))]
-    weather_errors = [abs(weather_pred_q[i] - true_quality[i]) for i in range(len(true_quality))]
+    img_errors = np.abs(img_pred_q - true_quality)
+    weather_errors = np.abs(weather_pred_q - true_quality)
     
     axes[1].bar(x - width/2, img_errors, width, label='Image-Only', color='steelblue', alpha=0.7)
     axes[1].bar(x + width/2, weather_errors, width, label='Weather-Only', color='lightgreen', alpha=0.7)
-    axes[1].set_ylabel('Absolute Error', fontsize=12, fontweight='bold')
-    axes[1].set_title('Prediction Errors', fontsize=12, fontweight='bold')
     axes[1].set_xticks(x[::5])
-    axes[1].set_xticklabels([common_dates[i] for i in range(0, len(common_dates), 5)], rotation=45)
-    axes[1].legend()
-    axes[1].grid(True, alpha=0.3, axis='y')
+    axes[1].set_xticklabels(common_dates[::5], rotation=45)
+    _style(axes[1], None, 'Absolute Error', 'Prediction Errors', grid_axis='y', legend=True)
     
     # Scatter: Image vs Weather predictions
-    axes[2].scatter(img_pred_q, weather_pred_q, alpha=0.6, s=50, c='purple', edgecolors='black', linewidth=0.5)
-    max_val = max(max(img_pred_q), max(weather_pred_q)) + 1
+    axes[2].plot(img_pred_q, weather_pred_q, markerfacecolor='purple', **POINT_STYLE)
+    max_val = max(img_pred_q.max(), weather_pred_q.max()) + 1
     axes[2].plot([0, max_val], [0, max_val], 'r--', linewidth=2, label='Agreement')
-    corr, p_val = pearsonr(img_pred_q, weather_pred_q)
+    corr, p_val = _pearson_with_p(img_pred_q, weather_pred_q)
     axes[2].text(0.05, 0.95, f'r = {corr:.3f}\np = {p_val:.3f}',
                 transform=axes[2].transAxes, fontsize=10,
                 verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
-    axes[2].set_xlabel('Image-Only Prediction', fontsize=12, fontweight='bold')
-    axes[2].set_ylabel('Weather-Only Prediction', fontsize=12, fontweight='bold')
-    axes[2].set_title('Model Agreement', fontsize=12, fontweight='bold')
-    axes[2].legend()
-    axes[2].grid(True, alpha=0.3)
-    axes[2].set_xlim(0, max_val)
-    axes[2].set_ylim(0, max_val)
-    
-    plt.tight_layout()
-    plt.savefig("figures/fig16_combined_comparison.pdf", bbox_inches='tight')
-    plt.close()
+    _style(axes[2], 'Image-Only Prediction', 'Weather-Only Prediction', 'Model Agreement',
+           xlim=(0, max_val), ylim=(0, max_val), legend=True)
+    
+    fig.tight_layout()
+    fig.savefig("figures/fig16_combined_comparison.pdf")
     print(f"✓ Figure 16: Combined comparison ({len(common_dates)} samples)")
 
 def create_figure_17_residual_comparison():
     """Figure 17: Residual comparison between models."""
-    comparison_file = Path("data/training/model_comparison.json")
-    with open(comparison_file, "r") as f:
-        comparison = json.load(f)
-    
-    img_results = comparison.get("image_only", [])
-    weather_results = comparison.get("weather_only", {}).get("predictions", [])
-    
-    if not img_results or not weather_results:
+    aligned = _aligned_predictions()
+    if aligned is None:
         return
+    _, true_quality, img_pred_q, weather_true_q, weather_pred_q = aligned
     
-    # Match by date
-    img_dict = {r["date"]: r for r in img_results}
-    weather_dict = {r["date"]: r for r in weather_results}
-    common_dates = sorted(set(img_dict.keys()) & set(weather_dict.keys()))
-    
-    true_quality = np.array([img_dict[d]["true_quality"] for d in common_dates])
-    img_residuals = np.array([img_dict[d]["pred_quality"] - img_dict[d]["true_quality"] for d in common_dates])
-    weather_residuals = np.array([weather_dict[d]["pred_quality"] - weather_dict[d]["true_quality"] for d in common_dates])
+    img_residuals = img_pred_q - true_quality
+    weather_residuals = weather_pred_q - weather_true_q
     
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    fig, axes = reusable_subplots(1, 2, figsize=(14, 5))
     
     # Residual scatter comparison
     axes[0].scatter(true_quality, img_residuals, alpha=0.6, s=50, c='steelblue', 
@@ -444,25 +466,18 @@ def create_figure_17_residual_comparison():
     axes[0].scatter(true_quality, weather_residuals, alpha=0.6, s=50, c='lightgreen',
                    edgecolors='black', linewidth=0.5, label='Weather-Only', marker='s')
     axes[0].axhline(y=0, color='r', linestyle='--', linewidth=2)
-    axes[0].set_xlabel('True Quality Score', fontsize=12, fontweight='bold')
-    axes[0].set_ylabel('Residual (Predicted - True)', fontsize=12, fontweight='bold')
-    axes[0].set_title('Residual Comparison', fontsize=12, fontweight='bold')
-    axes[0].legend()
-    axes[0].grid(True, alpha=0.3)
+    _style(axes[0], 'True Quality Score', 'Residual (Predicted - True)', 'Residual Comparison',
+           legend=True)
     
     # Residual distribution
     axes[1].hist(img_residuals, bins=15, alpha=0.6, label='Image-Only', color='steelblue', edgecolor='black')
     axes[1].hist(weather_residuals, bins=15, alpha=0.6, label='Weather-Only', color='lightgreen', edgecolor='black')
     axes[1].axvline(x=0, color='r', linestyle='--', linewidth=2)
-    axes[1].set_xlabel('Residual (Predicted - True)', fontsize=12, fontweight='bold')
-    axes[1].set_ylabel('Frequency', fontsize=12, fontweight='bold')
-    axes[1].set_title('Residual Distribution', fontsize=12, fontweight='bold')
-    axes[1].legend()
-    axes[1].grid(True, alpha=0.3, axis='y')
-    
-    plt.tight_layout()
-    plt.savefig("figures/fig17_residual_comparison.pdf", bbox_inches='tight')
-    plt.close()
+    _style(axes[1], 'Residual (Predicted - True)', 'Frequency', 'Residual Distribution',
+           grid_axis='y', legend=True)
+    
+    fig.tight_layout()
+    fig.savefig("figures/fig17_residual_comparison.pdf")
     print("✓ Figure 17: Residual comparison")
 
 if __name__ == "__main__":
@@ -470,12 +485,40 @@ if __name__ == "__main__":
     print("GENERATING WEATHER FIGURES")
     print("=" * 70)
     
-    create_figure_12_weather_architecture()
-    create_figure_13_weather_scatter()
-    create_figure_14_model_comparison()
-    create_figure_15_weather_features()
-    create_figure_16_combined_comparison()
-    create_figure_17_residual_comparison()
+    # Figures only need regenerating when their inputs (or this script) change
+    script_path = Path(__file__)
+    figures = [
+        ("fig12_weather_architecture", create_figure_12_weather_architecture, ()),
+        ("fig13_weather_scatter", create_figure_13_weather_scatter, (COMPARISON_FILE,)),
+        ("fig14_model_comparison", create_figure_14_model_comparison, (COMPARISON_FILE,)),
+        ("fig15_weather_features", create_figure_15_weather_features,
+         (COMPARISON_FILE, WEATHER_FILE)),
+        ("fig16_combined_comparison", create_figure_16_combined_comparison, (COMPARISON_FILE,)),
+        ("fig17_residual_comparison", create_figure_17_residual_comparison, (COMPARISON_FILE,)),
+    ]
+    
+    stale_figures = []
+    for name, create_figure, inputs in figures:
+        # A missing data file can't make a figure stale; the figure function
+        # reports it and skips
+        inputs = [p for p in inputs if Path(p).exists()]
+        if is_stale(f"figures/{name}.pdf", script_path, *inputs):
+            stale_figures.append(create_figure)
+        else:
+            print(f"✓ {name} is up to date, skipping")
+    
+    # The figures write independent PDFs and are CPU-bound in the PDF backend,
+    # so render them in separate processes (each with its own pyplot state)
+    workers = min(len(stale_figures), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(create_figure) for create_figure in stale_figures]:
+                future.result()
+    else:
+        for create_figure in stale_figures:
+            create_figure()
+    
+    plt.close('all')
     
     print("\n" + "=" * 70)
     print("✓ ALL WEATHER FIGURES GENERATED")
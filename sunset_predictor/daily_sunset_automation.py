@@ -39,26 +39,23 @@ def run_daily_automation():
     predictions_dir = Path("data/daily_predictions")
     predictions_dir.mkdir(parents=True, exist_ok=True)
     
+    # Write to a temp file and rename it into place, so the email job never
+    # reads a half-written prediction
     prediction_file = predictions_dir / f"{today.isoformat()}.json"
-    with open(prediction_file, 'w') as f:
-        json.dump(prediction, f, indent=2)
+    tmp_file = prediction_file.with_name(prediction_file.name + ".tmp")
+    tmp_file.write_text(json.dumps(prediction, indent=2))
+    tmp_file.replace(prediction_file)
     print(f"✓ Saved: {prediction_file}")
     
     # Step 4: Send email (if running at right time)
     print("\nStep 4: Checking if email should be sent...")
-    from astral import LocationInfo
-    from astral.sun import sun
-    from pytz import timezone
-    
-    BERKELEY_LAT = 37.8715
-    BERKELEY_LON = -122.2730
-    
-    location = LocationInfo("Berkeley", "California", "US/Pacific", BERKELEY_LAT, BERKELEY_LON)
-    s = sun(location.observer, date=today, tzinfo=location.timezone)
-    sunset_time = s["sunset"]
+    # predict_daily_sunset was loaded in step 2, so reuse its astral setup
+    # rather than importing astral and pytz again here
+    from predict_daily_sunset import get_sunset_time
+    sunset_time = get_sunset_time(today)
     email_time = sunset_time - timedelta(hours=1)
     
-    now = datetime.now(timezone('US/Pacific'))
+    now = datetime.now(sunset_time.tzinfo)
     
     # Only send email if we're within 30 minutes of the email time
     time_diff = abs((now - email_time).total_seconds())
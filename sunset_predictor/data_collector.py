@@ -5,12 +5,16 @@ Downloads historical webcam images and pairs them with sunset times.
 
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 import time
 from PIL import Image
 from io import BytesIO
 import json
+from io_utils import append_progress, load_progress, save_metadata
 
 # Berkeley coordinates
 BERKELEY_LAT = 37.8715
@@ -22,29 +26,84 @@ LBNL_WEBCAM_URL = "http://www.lbl.gov/webcam/current.jpg"
 # Alternative: If there's an archive URL pattern, update here
 ARCHIVE_URL_PATTERN = None  # e.g., "http://www.lbl.gov/webcam/archive/{date}/{time}.jpg"
 
+_session = None
+
+
+def get_session():
+    """
+    Get the shared HTTP session used by the downloaders.
+    
+    One session keeps connections to the same host alive between requests
+    (no new TCP/TLS handshake each time) and retries transient failures
+    (429/5xx) with backoff.
+    
+    Returns:
+        requests.Session; callers may mount their own adapters on it
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10, pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.5,
+                              status_forcelist=[429, 500, 502, 503, 504]))
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
+
+
+@lru_cache(maxsize=None)
+def _location(lat, lon):
+    """Build the astral location once per coordinate pair."""
+    from astral import LocationInfo
+    return LocationInfo("Berkeley", "California", "US/Pacific", lat, lon)
+
+
+@lru_cache(maxsize=4096)
+def _sunset_on(day, lat, lon):
+    """Compute the sunset for one calendar day (cached: callers repeat days a lot)."""
+    from astral.sun import sun
+    
+    location = _location(lat, lon)
+    return sun(location.observer, date=day, tzinfo=location.timezone)["sunset"]
+
 
 def get_sunset_time(date, lat=BERKELEY_LAT, lon=BERKELEY_LON):
     """
     Get sunset time for a given date in Berkeley using sunrise-sunset API.
     
+    Results are cached per calendar day, so repeated lookups for the same
+    date (e.g. several images from one day) only run astral once.
+    
     Args:
-        date: datetime object for the date
+        date: datetime (or date) object for the date
         lat: latitude (default: Berkeley)
         lon: longitude (default: Berkeley)
     
     Returns:
         datetime object with sunset time
     """
-    from astral import LocationInfo
-    from astral.sun import sun
+    day = date.date() if isinstance(date, datetime) else date
+    return _sunset_on(day, lat, lon)
+
+
+def get_sunset_times(dates, lat=BERKELEY_LAT, lon=BERKELEY_LON):
+    """
+    Get sunset times for many dates at once.
     
-    # Create location for Berkeley
-    location = LocationInfo("Berkeley", "California", "US/Pacific", lat, lon)
+    Each distinct calendar day is computed once, however many times it
+    appears in the input.
     
-    # Get sun information for the date
-    s = sun(location.observer, date=date.date(), tzinfo=location.timezone)
+    Args:
+        dates: Iterable of datetime or date objects
+        lat: latitude (default: Berkeley)
+        lon: longitude (default: Berkeley)
     
-    return s["sunset"]
+    Returns:
+        Dict mapping each calendar date to its sunset datetime
+    """
+    days = {d.date() if isinstance(d, datetime) else d for d in dates}
+    return {day: _sunset_on(day, lat, lon) for day in sorted(days)}
 
 
 def download_image(url, timeout=10):
@@ -59,7 +118,7 @@ def download_image(url, timeout=10):
         PIL Image object or None if download fails
     """
     try:
-        response = requests.get(url, timeout=timeout)
+        response = get_session().get(url, timeout=timeout)
         response.raise_for_status()
         img = Image.open(BytesIO(response.content))
         return img
@@ -82,80 +141,108 @@ def collect_historical_data(start_date, end_date, output_dir="data/raw_images",
         webcam_url: URL pattern for webcam images
     
     Returns:
-        List of metadata dictionaries with image paths and sunset times
+        List of metadata dictionaries with image paths and sunset times for
+        the requested range (also written to metadata.json), including
+        images saved by earlier runs that are still on disk
     """
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    metadata = []
+    # Each saved image is appended to metadata.jsonl as it happens, so an
+    # interrupted run keeps its progress and a rerun skips those dates
+    progress_path = output_path / "metadata.jsonl"
+    previous = load_progress(progress_path)
+    done_dates = {item["date"] for item in previous}
+    
+    # The progress file covers every run into this directory; only earlier
+    # records for the requested range whose image is still there are returned
+    first_day, last_day = start_date.date().isoformat(), end_date.date().isoformat()
+    metadata = [item for item in previous
+                if first_day <= item["date"] <= last_day
+                and Path(item["image_path"]).exists()]
     current_date = start_date
     
     print(f"Collecting data from {start_date.date()} to {end_date.date()}")
     print(f"Target: Images {hours_before_sunset} hours before sunset")
+    if metadata:
+        print(f"Resuming: {len(metadata)} dates already collected")
     
-    while current_date <= end_date:
-        try:
-            # Get sunset time for this date
-            sunset_time = get_sunset_time(current_date)
-            
-            # Calculate target capture time (3 hours before sunset)
-            target_time = sunset_time - timedelta(hours=hours_before_sunset)
-            
-            # If target time is in the past relative to current_date, skip
-            if target_time < current_date:
+    with open(progress_path, "a+b") as progress_file:
+        # Start on a fresh line in case the last run died mid-record
+        if progress_file.tell():
+            progress_file.seek(-1, os.SEEK_END)
+            if progress_file.read(1) != b"\n":
+                progress_file.write(b"\n")
+        
+        while current_date <= end_date:
+            if current_date.date().isoformat() in done_dates:
                 current_date += timedelta(days=1)
                 continue
             
-            # For historical data, we'll try to construct archive URLs
-            # If archive URL pattern is available, use it
-            if ARCHIVE_URL_PATTERN:
-                img_url = ARCHIVE_URL_PATTERN.format(
-                    date=target_time.strftime("%Y%m%d"),
-                    time=target_time.strftime("%H%M")
-                )
-            else:
-                # If no archive pattern, we can only get current image
-                # This is a limitation - user may need to provide historical archive
-                print(f"Warning: No archive URL pattern. Can only get current image.")
-                print(f"To collect historical data, you need to:")
-                print(f"1. Find the LBNL webcam archive URL pattern")
-                print(f"2. Update ARCHIVE_URL_PATTERN in this script")
-                print(f"3. Or provide a directory of historical images")
-                break
-            
-            # Download image
-            print(f"Downloading image for {target_time.strftime('%Y-%m-%d %H:%M')}...")
-            img = download_image(img_url)
-            
-            if img:
-                # Save image
-                filename = f"img_{target_time.strftime('%Y%m%d_%H%M%S')}.jpg"
-                filepath = output_path / filename
-                img.save(filepath, "JPEG")
+            try:
+                # Get sunset time for this date
+                sunset_time = get_sunset_time(current_date)
                 
-                # Store metadata
-                metadata.append({
-                    "image_path": str(filepath),
-                    "capture_time": target_time.isoformat(),
-                    "sunset_time": sunset_time.isoformat(),
-                    "hours_before_sunset": hours_before_sunset,
-                    "date": current_date.date().isoformat()
-                })
+                # Calculate target capture time (3 hours before sunset)
+                target_time = sunset_time - timedelta(hours=hours_before_sunset)
                 
-                print(f"Saved: {filename}")
-            
-            # Rate limiting
-            time.sleep(1)
+                # If target time is in the past relative to current_date, skip
+                if target_time < current_date:
+                    current_date += timedelta(days=1)
+                    continue
+                
+                # For historical data, we'll try to construct archive URLs
+                # If archive URL pattern is available, use it
+                if ARCHIVE_URL_PATTERN:
+                    img_url = ARCHIVE_URL_PATTERN.format(
+                        date=target_time.strftime("%Y%m%d"),
+                        time=target_time.strftime("%H%M")
+                    )
+                else:
+                    # If no archive pattern, we can only get current image
+                    # This is a limitation - user may need to provide historical archive
+                    print(f"Warning: No archive URL pattern. Can only get current image.")
+                    print(f"To collect historical data, you need to:")
+                    print(f"1. Find the LBNL webcam archive URL pattern")
+                    print(f"2. Update ARCHIVE_URL_PATTERN in this script")
+                    print(f"3. Or provide a directory of historical images")
+                    break
+                
+                # Download image
+                print(f"Downloading image for {target_time.strftime('%Y-%m-%d %H:%M')}...")
+                img = download_image(img_url)
+                
+                if img:
+                    # Save image
+                    filename = f"img_{target_time.strftime('%Y%m%d_%H%M%S')}.jpg"
+                    filepath = output_path / filename
+                    img.save(filepath, "JPEG")
+                    
+                    # Store metadata
+                    record = {
+                        "image_path": str(filepath),
+                        "capture_time": target_time.isoformat(),
+                        "sunset_time": sunset_time.isoformat(),
+                        "hours_before_sunset": hours_before_sunset,
+                        "date": current_date.date().isoformat()
+                    }
+                    metadata.append(record)
+                    append_progress(progress_file, record)
+                    
+                    print(f"Saved: {filename}")
+                
+                # Rate limiting
+                time.sleep(1)
+                
+            except Exception as e:
+                print(f"Error processing date {current_date.date()}: {e}")
             
-        except Exception as e:
-            print(f"Error processing date {current_date.date()}: {e}")
-        
-        current_date += timedelta(days=1)
+            current_date += timedelta(days=1)
     
     # Save metadata
+    metadata.sort(key=lambda item: item["date"])
     metadata_path = output_path / "metadata.json"
-    with open(metadata_path, "w") as f:
-        json.dump(metadata, f, indent=2)
+    save_metadata(metadata, metadata_path)
     
     print(f"\nCollected {len(metadata)} images")
     print(f"Metadata saved to {metadata_path}")
@@ -182,11 +269,15 @@ def load_existing_images(image_dir, metadata_file=None):
             return json.load(f)
     
     # If no metadata file, try to infer from filenames
-    metadata = []
-    for img_file in image_path.glob("*.jpg"):
+    # os.scandir lists the directory without building a Path per entry
+    parsed = []
+    with os.scandir(image_path) as entries:
+        jpg_names = [entry.name for entry in entries if entry.name.endswith(".jpg")]
+    for name in jpg_names:
+        img_file = image_path / name
         # Try to extract date/time from filename
         # Common patterns: img_YYYYMMDD_HHMMSS.jpg, YYYYMMDD_HHMMSS.jpg, etc.
-        filename = img_file.stem
+        filename = name[:-len(".jpg")]
         try:
             # Try to parse timestamp from filename
             if "img_" in filename:
@@ -195,24 +286,32 @@ def load_existing_images(image_dir, metadata_file=None):
             else:
                 # Try other patterns
                 capture_time = datetime.strptime(filename, "%Y%m%d_%H%M%S")
-            
-            # Get sunset time for that date
-            sunset_time = get_sunset_time(capture_time)
-            
-            # Calculate hours before sunset
-            hours_before = (sunset_time - capture_time).total_seconds() / 3600
-            
-            metadata.append({
-                "image_path": str(img_file),
-                "capture_time": capture_time.isoformat(),
-                "sunset_time": sunset_time.isoformat(),
-                "hours_before_sunset": hours_before,
-                "date": capture_time.date().isoformat()
-            })
+            parsed.append((img_file, capture_time))
         except Exception as e:
             print(f"Could not parse timestamp from {img_file}: {e}")
             continue
     
+    # Many images share a day, so look each sunset up once per date
+    sunsets = get_sunset_times(capture_time for _, capture_time in parsed)
+    
+    metadata = []
+    for img_file, capture_time in parsed:
+        sunset_time = sunsets[capture_time.date()]
+        # Filename timestamps are local webcam time; make them tz-aware so
+        # they can be compared with the sunset
+        capture_time = capture_time.replace(tzinfo=sunset_time.tzinfo)
+        
+        # Calculate hours before sunset
+        hours_before = (sunset_time - capture_time).total_seconds() / 3600
+        
+        metadata.append({
+            "image_path": str(img_file),
+            "capture_time": capture_time.isoformat(),
+            "sunset_time": sunset_time.isoformat(),
+            "hours_before_sunset": hours_before,
+            "date": capture_time.date().isoformat()
+        })
+    
     return metadata
 
 
@@ -4,6 +4,7 @@ Creates train/test splits and prepares data for model training.
 """
 
 import json
+import os
 import numpy as np
 from pathlib import Path
 from datetime import datetime
@@ -14,6 +15,7 @@ import torch
 from torch.utils.data import Dataset, DataLoader
 from torchvision import transforms
 import pickle
+from io_utils import save_metadata
 
 
 class SunsetDataset(Dataset):
@@ -21,18 +23,46 @@ class SunsetDataset(Dataset):
     PyTorch Dataset for sunset prediction from images.
     """
     
-    def __init__(self, metadata, image_dir, transform=None, target_type="hours_until_sunset"):
+    def __init__(self, metadata, image_dir, transform=None, target_type="hours_until_sunset",
+                 decode_size=None):
         """
         Args:
             metadata: List of metadata dictionaries
             image_dir: Base directory for images
             transform: Image transforms
             target_type: What to predict - "hours_until_sunset" or "sunset_time"
+            decode_size: If set, let the JPEG decoder downscale to roughly this
+                size (never below it) before the transforms run; use the
+                same value for training and inference
         """
         self.metadata = metadata
         self.image_dir = Path(image_dir)
         self.transform = transform
         self.target_type = target_type
+        self.decode_size = decode_size
+        
+        # Metadata is static, so resolve image paths and targets once here
+        # rather than re-parsing timestamps on every sample
+        self._img_paths = []
+        targets = []
+        for item in metadata:
+            img_path = item["image_path"]
+            if not os.path.isabs(img_path):
+                img_path = os.path.join(image_dir, img_path)
+            self._img_paths.append(img_path)
+            
+            sunset_time = datetime.fromisoformat(item["sunset_time"])
+            if target_type == "hours_until_sunset":
+                # Predict hours until sunset
+                capture_time = datetime.fromisoformat(item["capture_time"])
+                targets.append((sunset_time - capture_time).total_seconds() / 3600.0)
+            else:
+                # Predict sunset time as hours from midnight
+                targets.append(sunset_time.hour + sunset_time.minute / 60.0)
+        self._targets = torch.tensor(targets, dtype=torch.float32)
+        # Put the targets in shared memory so DataLoader workers all read
+        # one copy instead of each holding their own
+        self._targets.share_memory_()
         
         if self.transform is None:
             self.transform = transforms.Compose([
@@ -46,15 +76,16 @@ class SunsetDataset(Dataset):
         return len(self.metadata)
     
     def __getitem__(self, idx):
-        item = self.metadata[idx]
-        
         # Load image
-        img_path = Path(item["image_path"])
-        if not img_path.is_absolute():
-            img_path = self.image_dir / img_path
+        img_path = self._img_paths[idx]
         
         try:
-            image = Image.open(img_path).convert("RGB")
+            image = Image.open(img_path)
+            if self.decode_size:
+                # JPEG DCT scaling: decoding at 1/2, 1/4 or 1/8 resolution is
+                # much cheaper than decoding full size only to resize to 224
+                image.draft("RGB", (self.decode_size, self.decode_size))
+            image = image.convert("RGB")
         except Exception as e:
             print(f"Error loading image {img_path}: {e}")
             # Return a black image as fallback
@@ -64,20 +95,7 @@ class SunsetDataset(Dataset):
         if self.transform:
             image = self.transform(image)
         
-        # Get target
-        if self.target_type == "hours_until_sunset":
-            # Predict hours until sunset
-            capture_time = datetime.fromisoformat(item["capture_time"])
-            sunset_time = datetime.fromisoformat(item["sunset_time"])
-            hours_until = (sunset_time - capture_time).total_seconds() / 3600.0
-            target = torch.tensor(hours_until, dtype=torch.float32)
-        else:
-            # Predict sunset time as hours from midnight
-            sunset_time = datetime.fromisoformat(item["sunset_time"])
-            hours_from_midnight = sunset_time.hour + sunset_time.minute / 60.0
-            target = torch.tensor(hours_from_midnight, dtype=torch.float32)
-        
-        return image, target
+        return image, self._targets[idx]
 
 
 def create_train_test_split(metadata, test_size=0.2, random_state=42, 
@@ -142,11 +160,8 @@ def build_dataset(metadata_file, image_dir, output_dir="data/processed",
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    with open(output_path / "train_metadata.json", "w") as f:
-        json.dump(train_meta, f, indent=2)
-    
-    with open(output_path / "test_metadata.json", "w") as f:
-        json.dump(test_meta, f, indent=2)
+    save_metadata(train_meta, output_path / "train_metadata.json")
+    save_metadata(test_meta, output_path / "test_metadata.json")
     
     print(f"Saved train/test splits to {output_path}")
     
@@ -206,8 +221,10 @@ def get_data_loaders(train_metadata_file, test_metadata_file, image_dir,
     ])
     
     # Create datasets
-    train_dataset = SunsetDataset(train_meta, image_dir, transform=train_transform)
-    test_dataset = SunsetDataset(test_meta, image_dir, transform=test_transform)
+    train_dataset = SunsetDataset(train_meta, image_dir, transform=train_transform,
+                                  decode_size=image_size)
+    test_dataset = SunsetDataset(test_meta, image_dir, transform=test_transform,
+                                 decode_size=image_size)
     
     # Create data loaders
     train_loader = DataLoader(
@@ -2,15 +2,20 @@
 Download 300 timelapse videos from LHS and extract sunset frames.
 """
 
-import requests
 from pathlib import Path
 from datetime import datetime, timedelta
+import math
+import shutil
 import subprocess
-import json
-import time
+from concurrent.futures import ThreadPoolExecutor
+from data_collector import get_session, get_sunset_time
+from io_utils import save_metadata
 
 LHS_BASE = "https://www.ocf.berkeley.edu/~thelawrence/timelapse/"
 
+# Concurrent video downloads; kept low to stay polite to the archive server
+MAX_PARALLEL_DOWNLOADS = 4
+
 
 def download_lhs_video(date, output_dir="data/lhs_timelapses"):
     """
@@ -30,21 +35,24 @@ def download_lhs_video(date, output_dir="data/lhs_timelapses"):
         f"{LHS_BASE}{date_str}view.mp4",
     ]
     
+    session = get_session()
     for url in url_patterns:
         try:
-            response = requests.head(url, timeout=5, allow_redirects=True)
+            response = session.head(url, timeout=5, allow_redirects=True)
             if response.status_code == 200:
                 # Download it
                 print(f"  Downloading: {date_str}")
-                video_response = requests.get(url, timeout=60, stream=True)
+                video_response = session.get(url, timeout=60, stream=True)
                 video_response.raise_for_status()
                 
                 filename = f"lhs_{date_str}.mp4"
                 filepath = output_path / filename
                 
+                # Copy the raw stream in 1 MiB blocks rather than iterating
+                # over small chunks in Python
+                video_response.raw.decode_content = True
                 with open(filepath, 'wb') as f:
-                    for chunk in video_response.iter_content(chunk_size=8192):
-                        f.write(chunk)
+                    shutil.copyfileobj(video_response.raw, f, length=1 << 20)
                 
                 if filepath.exists() and filepath.stat().st_size > 1000:
                     print(f"    ✓ Saved: {filename}")
@@ -55,9 +63,26 @@ def download_lhs_video(date, output_dir="data/lhs_timelapses"):
     return None
 
 
+def get_video_fps(video_path):
+    """Probe a video's frame rate with ffprobe; returns None if it can't be read."""
+    try:
+        result = subprocess.run([
+            'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+            '-show_entries', 'stream=r_frame_rate', '-of', 'default=noprint_wrappers=1:nokey=1',
+            str(video_path)
+        ], capture_output=True, text=True, timeout=10)
+        
+        frame_rate_str = result.stdout.strip()
+        if '/' in frame_rate_str:
+            num, den = map(int, frame_rate_str.split('/'))
+            return num / den
+        return float(frame_rate_str)
+    except Exception:
+        return None
+
+
 def extract_sunset_frame(video_path, date, output_dir="data/sunset_images_for_grading"):
     """Extract sunset frame from video using ffmpeg."""
-    from data_collector import get_sunset_time
     from pytz import timezone
     
     output_path = Path(output_dir)
@@ -75,10 +100,21 @@ def extract_sunset_frame(video_path, date, output_dir="data/sunset_images_for_gr
     # Extract frame
     output_file = output_path / f"sunset_{date.strftime('%Y%m%d')}.jpg"
     
+    # Seek on the input side so ffmpeg jumps straight to the frame instead of
+    # decoding everything before it; fall back to counting frames if the
+    # frame rate can't be probed
+    fps = get_video_fps(video_path)
+    if fps:
+        # Round the seek time down: rounding up could land past the frame's
+        # pts, and ffmpeg would then return the next frame
+        seek_seconds = math.floor(frame_number / fps * 1000) / 1000
+        seek_args = ['-ss', f"{seek_seconds:.3f}", '-i', str(video_path)]
+    else:
+        seek_args = ['-i', str(video_path), '-vf', f'select=eq(n\\,{frame_number})']
+    
     try:
         subprocess.run([
-            'ffmpeg', '-i', str(video_path),
-            '-vf', f'select=eq(n\\,{frame_number})',
+            'ffmpeg', *seek_args,
             '-vframes', '1',
             '-q:v', '2',
             '-y',  # Overwrite
@@ -114,7 +150,6 @@ def download_and_extract_300_sunsets(num_sunsets=300, start_date=None):
     
     downloaded = 0
     extracted = 0
-    current_date = start_date
     
     # Check if ffmpeg is available
     try:
@@ -127,57 +162,62 @@ def download_and_extract_300_sunsets(num_sunsets=300, start_date=None):
     
     metadata = []
     
-    for i in range(num_sunsets):
-        print(f"\n[{i+1}/{num_sunsets}] Date: {current_date}")
-        
-        # Check if we already have this sunset
-        sunset_file = sunsets_dir / f"sunset_{current_date.strftime('%Y%m%d')}.jpg"
-        if sunset_file.exists():
-            print("  ✓ Already have sunset image")
+    # Skip dates we already have a sunset image for
+    dates = [start_date - timedelta(days=i) for i in range(num_sunsets)]
+    pending_dates = []
+    for date in dates:
+        if (sunsets_dir / f"sunset_{date.strftime('%Y%m%d')}.jpg").exists():
             extracted += 1
-            current_date -= timedelta(days=1)
-            continue
-        
-        # Try to download video
-        video_path = download_lhs_video(current_date)
-        
-        if video_path:
-            downloaded += 1
-            
-            # Extract sunset frame
-            if ffmpeg_available:
-                sunset_img = extract_sunset_frame(video_path, current_date)
-                if sunset_img:
-                    extracted += 1
-                    print(f"    ✓ Extracted sunset frame")
-                    
-                    # Add to metadata
-                    sunset_time = get_sunset_time(datetime.combine(current_date, datetime.min.time()))
-                    metadata.append({
-                        "date": current_date.isoformat(),
-                        "sunset_time": sunset_time.isoformat(),
-                        "image_path": str(sunset_img),
-                        "quality_score": None,
-                        "graded": False,
-                        "source": "LHS_timelapse"
-                    })
         else:
-            print(f"  ✗ No video found for {current_date}")
-        
-        current_date -= timedelta(days=1)
-        
-        # Rate limiting
-        time.sleep(0.5)
-        
-        # Progress update every 10
-        if (i + 1) % 10 == 0:
-            print(f"\n  Progress: {downloaded} videos downloaded, {extracted} sunsets extracted")
+            pending_dates.append(date)
+    if extracted:
+        print(f"✓ Already have {extracted} sunset images")
+    
+    # Downloads are network-bound, so fetch a few videos at once over the
+    # shared session (the worker cap doubles as rate limiting); frames are
+    # extracted in date order as each download finishes
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_DOWNLOADS) as executor:
+        video_paths = executor.map(download_lhs_video, pending_dates)
+        try:
+            for i, (current_date, video_path) in enumerate(zip(pending_dates, video_paths)):
+                print(f"\n[{i+1}/{len(pending_dates)}] Date: {current_date}")
+                
+                if video_path:
+                    downloaded += 1
+                    
+                    # Extract sunset frame
+                    if ffmpeg_available:
+                        sunset_img = extract_sunset_frame(video_path, current_date)
+                        if sunset_img:
+                            extracted += 1
+                            print(f"    ✓ Extracted sunset frame")
+                            
+                            # Add to metadata
+                            sunset_time = get_sunset_time(datetime.combine(current_date, datetime.min.time()))
+                            metadata.append({
+                                "date": current_date.isoformat(),
+                                "sunset_time": sunset_time.isoformat(),
+                                "image_path": str(sunset_img),
+                                "quality_score": None,
+                                "graded": False,
+                                "source": "LHS_timelapse"
+                            })
+                else:
+                    print(f"  ✗ No video found for {current_date}")
+                
+                # Progress update every 10
+                if (i + 1) % 10 == 0:
+                    print(f"\n  Progress: {downloaded} videos downloaded, {extracted} sunsets extracted")
+        except BaseException:
+            # map() has queued every date; on Ctrl-C or an error stop the
+            # queued downloads instead of letting shutdown wait for them all
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
     
     # Save metadata
     metadata_file = sunsets_dir / "sunset_metadata.json"
     if metadata:
-        with open(metadata_file, "w") as f:
-            json.dump(metadata, f, indent=2)
+        save_metadata(metadata, metadata_file)
         print(f"\n✓ Saved metadata: {metadata_file}")
     
     print("\n" + "=" * 70)
@@ -3,10 +3,10 @@ Download midday image from LHS livestream every day at 3pm.
 Saves to data/daily_midday/YYYY-MM-DD.jpg
 """
 
-import requests
 from pathlib import Path
 from datetime import datetime
 import time
+from data_collector import get_session
 
 # LHS livestream URL (update if needed)
 LHS_LIVESTREAM_URL = "https://lawrencehallofscience.org/play/view/"
@@ -30,9 +30,10 @@ def download_midday_image(output_dir="data/daily_midday"):
         # Add more if we find the actual URL
     ]
     
+    session = get_session()
     for url in urls_to_try:
         try:
-            response = requests.get(url, timeout=10)
+            response = session.get(url, timeout=10)
             if response.status_code == 200 and len(response.content) > 1000:  # Valid image
                 with open(filepath, 'wb') as f:
                     f.write(response.content)
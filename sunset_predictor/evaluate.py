@@ -169,7 +169,9 @@ def main():
                            std=[0.229, 0.224, 0.225])
     ])
     
-    test_dataset = SunsetDataset(test_meta, args.image_dir, transform=test_transform)
+    # Decode the same way get_data_loaders does for training
+    test_dataset = SunsetDataset(test_meta, args.image_dir, transform=test_transform,
+                                 decode_size=224)
     test_loader = DataLoader(
         test_dataset, batch_size=args.batch_size, shuffle=False,
         num_workers=4, pin_memory=True
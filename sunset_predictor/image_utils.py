@@ -0,0 +1,16 @@
+"""
+Shared image helpers for the figure scripts.
+"""
+
+from pathlib import Path
+from PIL import Image
+
+
+def fast_open(path, box):
+    """Open an image downscaled to fit box, letting libjpeg decode at reduced DCT scale."""
+    img = Image.open(path)
+    if Path(path).suffix.lower() in ('.jpg', '.jpeg'):
+        img.draft('RGB', box)
+    img = img.convert('RGB')
+    img.thumbnail(box, Image.Resampling.BILINEAR)
+    return img
@@ -0,0 +1,80 @@
+"""
+Small file I/O helpers shared by the scripts (no third-party dependencies
+beyond an optional orjson).
+"""
+
+import json
+from pathlib import Path
+
+# orjson is optional; it serialises large metadata lists several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def is_stale(output_path, *input_paths):
+    """Return True if output_path is missing or older than any input (make-style)."""
+    output_path = Path(output_path)
+    if not output_path.exists():
+        return True
+    output_mtime = output_path.stat().st_mtime
+    return any(Path(p).stat().st_mtime > output_mtime for p in input_paths)
+
+
+def save_metadata(metadata, path):
+    """
+    Write a metadata list as indented JSON in a single buffered write.
+    
+    Uses orjson when it is installed, otherwise the standard library; the
+    output is the same indent=2 layout either way.
+    
+    Args:
+        metadata: JSON-serialisable list of metadata dictionaries
+        path: Output file path
+    """
+    if orjson is not None:
+        data = orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(metadata, indent=2).encode()
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def load_progress(path):
+    """
+    Read the records saved so far by an earlier (possibly interrupted) run.
+    
+    Args:
+        path: JSON Lines progress file
+    
+    Returns:
+        List of metadata dictionaries; empty if the file doesn't exist.
+        Blank lines and a truncated record from a crash are skipped.
+    """
+    records = []
+    if not Path(path).exists():
+        return records
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def append_progress(f, record):
+    """
+    Append one metadata record to an open JSON Lines progress file.
+    
+    Args:
+        f: File opened in binary append mode
+        record: JSON-serialisable metadata dictionary
+    """
+    if orjson is not None:
+        line = orjson.dumps(record)
+    else:
+        line = json.dumps(record).encode()
+    f.write(line + b"\n")
+    f.flush()